@@ -1,20 +1,42 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from services.fmp_service import FMPService
+from services.finnhub_service import FinnhubService
+from services.provider_router import LatencyTracker, ProviderRouter
+from services.async_http import AsyncHTTPClient
+from services.dividend_store import DividendStore
+from services.prewarm import Prewarmer, SymbolPopularity
+from services.llm_client import OpenAIClientPool
+from services.chat_cache import ChatResponseCache
+from services.prompt_budget import PromptAssembler, cap_user_context
+from services.chat_prompts import SystemPromptBuilder
+from services.admission import Bulkhead, BulkheadFull
+from services.context_sync import ContextSyncError, apply_dom_delta, apply_json_patch, decode_body
+from services.context_store import SessionContextStore
+from services.waitlist import WaitlistPipeline, WaitlistQueue, WaitlistStore, file_lock
+from services.cache import TTLCache, MemoryCacheBackend, SQLiteCacheBackend
+from services.rate_limit import RateGovernor
 import os
+import functools
+import hmac
+import threading
 from dotenv import load_dotenv
 import time
+import json
 import typing as t
-from openai import OpenAI
 import re
-import csv
 from datetime import datetime
-import httpx
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
+# Railway/Heroku/Render put one proxy in front of the app. Only the X-Forwarded-For
+# entries those proxies appended are trusted; anything further left came from the client.
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '1'))
+if TRUSTED_PROXY_HOPS > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
 # Enable CORS for frontend requests from production and local dev
 CORS(app, resources={
     r"/api/*": {
@@ -25,7 +47,7 @@ CORS(app, resources={
             "http://127.0.0.1:3000"
         ],
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
+        "allow_headers": ["Content-Type", "Content-Encoding", "Authorization", "X-Session-Id"],
         "supports_credentials": True
     }
 })
@@ -33,23 +55,213 @@ CORS(app, resources={
 # Simple email validator
 EMAIL_RE = re.compile(r"^[^\s@]+@[^\s@]+\.[^\s@]+$")
 
-# Initialize FMP service
-fmp_service = FMPService(api_key=os.getenv('FMP_API_KEY'))
-
-# In-memory store for latest screen context (updated by frontend)
-LATEST_CONTEXT: dict[str, t.Any] = {
-    "updated_at": None,
-    "dom": None,
-    "app_state": None,
-    "url": None,
-}
+# Initialize FMP service (dividend series and prices cached with separate TTLs).
+# The default SQLite backend is shared by every gunicorn worker on the host.
+def build_market_cache_backend():
+    backend = os.getenv('MARKET_CACHE_BACKEND', 'sqlite').lower()
+    max_entries = int(os.getenv('MARKET_CACHE_MAX_ENTRIES', '2000'))
+    if backend == 'memory':
+        return MemoryCacheBackend(
+            max_entries=max_entries,
+            max_bytes=int(os.getenv('MARKET_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+        )
+    cache_path = os.getenv(
+        'MARKET_CACHE_PATH',
+        os.path.join(os.path.dirname(__file__), 'data', 'market_cache.sqlite3')
+    )
+    return SQLiteCacheBackend(cache_path, max_entries=max_entries)
+
+market_data_cache = TTLCache(backend=build_market_cache_backend())
+
+# Client-side quota: each worker gets an equal share of the plan's calls/minute.
+# gunicorn.conf.py exports the worker count it starts; the default matches its default.
+def build_rate_governor(calls_per_minute_env, default_calls_per_minute):
+    workers = max(1, int(os.getenv('WEB_CONCURRENCY', '2')))
+    calls_per_minute = float(os.getenv(calls_per_minute_env, str(default_calls_per_minute)))
+    return RateGovernor(
+        calls_per_minute=calls_per_minute / workers,
+        max_queue_wait=float(os.getenv('RATE_LIMIT_MAX_QUEUE_WAIT', '5')),
+        max_retries=int(os.getenv('RATE_LIMIT_MAX_RETRIES', '3'))
+    )
+
+fmp_governor = build_rate_governor('FMP_CALLS_PER_MINUTE', 300)
+
+# Pooled async HTTP client (HTTP/2 + keep-alive) per provider; the services use
+# its sync facade. MARKET_DATA_HTTP=requests falls back to requests.Session.
+def build_http_client():
+    if os.getenv('MARKET_DATA_HTTP', 'async').lower() != 'async':
+        return None
+    return AsyncHTTPClient(
+        max_connections=int(os.getenv('MARKET_DATA_MAX_CONNECTIONS', '20')),
+        max_keepalive_connections=int(os.getenv('MARKET_DATA_MAX_KEEPALIVE', '10')),
+        keepalive_expiry=float(os.getenv('MARKET_DATA_KEEPALIVE_EXPIRY', '30')),
+        http2=os.getenv('MARKET_DATA_HTTP2', '1').lower() in ('1', 'true', 'yes')
+    )
+fmp_service = FMPService(
+    api_key=os.getenv('FMP_API_KEY'),
+    max_workers=int(os.getenv('FMP_BATCH_MAX_WORKERS', '8')),
+    batch_timeout=float(os.getenv('FMP_BATCH_TIMEOUT', '20')),
+    cache=market_data_cache,
+    dividend_ttl=float(os.getenv('FMP_DIVIDEND_TTL', str(FMPService.DIVIDEND_TTL))),
+    price_ttl=float(os.getenv('FMP_PRICE_TTL', str(FMPService.PRICE_TTL))),
+    governor=fmp_governor,
+    http_client=build_http_client(),
+    dividend_store=DividendStore(os.getenv(
+        'DIVIDEND_STORE_PATH',
+        os.path.join(os.path.dirname(__file__), 'data', 'dividends.sqlite3')
+    )),
+    base_url=os.getenv('FMP_BASE_URL') or None
+)
+
+# Market data router: primary/fallback across providers with circuit breakers.
+# Finnhub joins as a fallback when FINNHUB_API_KEY is set.
+providers = {'fmp': fmp_service}
+if os.getenv('FINNHUB_API_KEY'):
+    providers['finnhub'] = FinnhubService(
+        api_key=os.getenv('FINNHUB_API_KEY'),
+        governor=build_rate_governor('FINNHUB_CALLS_PER_MINUTE', 60),
+        http_client=build_http_client()
+    )
+provider_order = [
+    name.strip() for name in os.getenv('MARKET_DATA_PROVIDERS', 'fmp,finnhub').split(',')
+    if name.strip() in providers
+] or ['fmp']
+market_data = ProviderRouter(
+    [(name, providers[name]) for name in provider_order],
+    hedge=os.getenv('MARKET_DATA_HEDGING', '').lower() in ('1', 'true', 'yes'),
+    hedge_delay=float(os.getenv('MARKET_DATA_HEDGE_DELAY', '1.0')),
+    latency_threshold=float(os.getenv('MARKET_DATA_SLOW_CALL', '8')),
+    # Failover shares the FMP batch deadline rather than starting a fresh one
+    batch_timeout=float(os.getenv('FMP_BATCH_TIMEOUT', '20'))
+)
+
+# Keep the most requested tickers warm so popular lookups are always cache hits
+symbol_popularity = SymbolPopularity()
+prewarmer = Prewarmer(
+    fmp_service,
+    symbol_popularity,
+    calls_per_minute=fmp_governor.bucket.rate * 60,
+    top_n=int(os.getenv('PREWARM_TOP_N', '25')),
+    interval=float(os.getenv('PREWARM_INTERVAL', '60')),
+    quota_share=float(os.getenv('PREWARM_QUOTA_SHARE', '0.2'))
+)
+if os.getenv('FMP_API_KEY') and os.getenv('PREWARM_ENABLED', '1').lower() in ('1', 'true', 'yes'):
+    prewarmer.start()
+
+# Shared OpenAI client for /api/chat. Set OPENAI_BASE_URL to an OpenAI-compatible
+# stand-in (tools/fake_openai_server.py) to load-test without the real service.
+openai_pool = OpenAIClientPool(
+    api_key=os.getenv('OPENAI_API_KEY'),
+    base_url=os.getenv('OPENAI_BASE_URL') or None,
+    timeout=float(os.getenv('OPENAI_TIMEOUT', '60')),
+    connect_timeout=float(os.getenv('OPENAI_CONNECT_TIMEOUT', '5')),
+    max_retries=int(os.getenv('OPENAI_MAX_RETRIES', '2')),
+    max_connections=int(os.getenv('OPENAI_MAX_CONNECTIONS', '20')),
+    max_keepalive_connections=int(os.getenv('OPENAI_MAX_KEEPALIVE', '10'))
+)
+
+# Reply cache for /api/chat. Only modes listed in CHAT_CACHE_MODES are cached (the
+# key covers the whole prompt, so per-user numbers never leak between users);
+# CHAT_CACHE_SIMILARITY (e.g. 0.9) also reuses replies to reworded questions.
+chat_cache = ChatResponseCache(
+    enabled_modes=[
+        mode.strip() for mode in os.getenv('CHAT_CACHE_MODES', 'article_assistant').split(',') if mode.strip()
+    ],
+    ttl=float(os.getenv('CHAT_CACHE_TTL', str(6 * 60 * 60))),
+    max_entries=int(os.getenv('CHAT_CACHE_MAX_ENTRIES', '1000')),
+    similarity_threshold=float(os.getenv('CHAT_CACHE_SIMILARITY')) if os.getenv('CHAT_CACHE_SIMILARITY') else None
+)
+
+# Rendered system prompts, reused while a session's userContext is unchanged
+prompt_builder = SystemPromptBuilder()
+
+# Keeps /api/chat prompts within a token budget however long the session gets
+prompt_assembler = PromptAssembler(
+    budget=int(os.getenv('CHAT_PROMPT_TOKEN_BUDGET', '3000')),
+    max_message_tokens=int(os.getenv('CHAT_MAX_MESSAGE_TOKENS', '500'))
+)
+
+# Bulkhead for LLM-backed routes. Waiting requests also occupy a worker thread, so keep
+# CHAT_MAX_CONCURRENT + CHAT_MAX_QUEUE below the worker's thread count; the remaining
+# threads stay free for /api/health and the market data routes.
+chat_bulkhead = Bulkhead(
+    'chat',
+    max_concurrent=int(os.getenv('CHAT_MAX_CONCURRENT', '3')),
+    max_queue=int(os.getenv('CHAT_MAX_QUEUE', '2')),
+    queue_timeout=float(os.getenv('CHAT_QUEUE_TIMEOUT', '5')),
+    per_client=int(os.getenv('CHAT_MAX_PER_CLIENT', '2'))
+)
+
+# Screen context per browser session (updated by frontend). The default SQLite backend
+# lets every gunicorn worker serve reads and deltas for any session; the memory backend
+# is per process but bounds sessions by count and total DOM size.
+def build_context_cache_backend():
+    backend = os.getenv('MCP_CONTEXT_BACKEND', 'sqlite').lower()
+    max_sessions = int(os.getenv('MCP_CONTEXT_MAX_SESSIONS', '500'))
+    if backend == 'memory':
+        return MemoryCacheBackend(
+            max_entries=max_sessions,
+            max_bytes=int(os.getenv('MCP_CONTEXT_MEMORY_BYTES', str(64 * 1024 * 1024)))
+        )
+    return SQLiteCacheBackend(os.getenv(
+        'MCP_CONTEXT_PATH',
+        os.path.join(os.path.dirname(__file__), 'data', 'screen_context.sqlite3')
+    ), max_entries=max_sessions)
+
+context_store = SessionContextStore(
+    TTLCache(backend=build_context_cache_backend()),
+    ttl=float(os.getenv('MCP_CONTEXT_TTL', str(2 * 60 * 60)))
+)
+SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+# Largest decompressed context body accepted
+MCP_CONTEXT_MAX_BYTES = int(os.getenv('MCP_CONTEXT_MAX_BYTES', str(5 * 1024 * 1024)))
+
+# Waitlist signups: /api/waitlist only appends to a SQLite queue. Background threads
+# batch queued signups into the indexed waitlist store (one row per email) and forward
+# them to WAITLIST_WEBHOOK_URL with retries, so a slow webhook never holds a request thread.
+waitlist_queue = WaitlistQueue(os.getenv(
+    'WAITLIST_QUEUE_PATH',
+    os.path.join(os.path.dirname(__file__), 'data', 'waitlist_queue.sqlite3')
+))
+waitlist_store = WaitlistStore(os.getenv(
+    'WAITLIST_DB_PATH',
+    os.path.join(os.path.dirname(__file__), 'data', 'waitlist.sqlite3')
+))
+# Signups collected before the store existed live in waitlist.csv; load them once
+LEGACY_WAITLIST_CSV = os.path.join(os.path.dirname(__file__), 'waitlist.csv')
+with file_lock(waitlist_store.path + '.import.lock'):
+    if waitlist_store.is_empty() and os.path.exists(LEGACY_WAITLIST_CSV):
+        print(f"Imported {waitlist_store.import_csv(LEGACY_WAITLIST_CSV)} emails from waitlist.csv")
+waitlist_pipeline = WaitlistPipeline(
+    waitlist_queue,
+    waitlist_store,
+    webhook_url=os.getenv('WAITLIST_WEBHOOK_URL') or None,
+    batch_size=int(os.getenv('WAITLIST_BATCH_SIZE', '50')),
+    interval=float(os.getenv('WAITLIST_FLUSH_INTERVAL', '2')),
+    max_attempts=int(os.getenv('WAITLIST_WEBHOOK_MAX_ATTEMPTS', '8'))
+)
+waitlist_pipeline.start()
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'service': 'FIRE Tracker API'
+        'service': 'FIRE Tracker API',
+        'cache': market_data_cache.stats(),
+        'singleFlight': fmp_service.flight.stats(),
+        'rateLimit': {
+            name: service.governor.stats()
+            for name, service in providers.items() if service.governor
+        },
+        'providers': market_data.stats(),
+        'prewarm': prewarmer.stats(),
+        'chat': chat_stream_stats(),
+        'chatCache': chat_cache.stats(),
+        'chatPrompts': prompt_builder.stats(),
+        'admission': {'chat': chat_bulkhead.stats()},
+        'screenContext': context_store.stats(),
+        'waitlist': waitlist_pipeline.stats()
     }), 200
 
 @app.post('/api/waitlist')
@@ -62,37 +274,54 @@ def waitlist():
         if not email or not EMAIL_RE.match(email):
             return jsonify({'success': False, 'error': 'invalid_email'}), 400
 
-        # Persist to CSV (server-side storage)
-        csv_path = os.path.join(os.path.dirname(__file__), 'waitlist.csv')
-        is_new_file = not os.path.exists(csv_path)
-        with open(csv_path, 'a', newline='') as f:
-            writer = csv.writer(f)
-            if is_new_file:
-                writer.writerow(['timestamp_iso', 'email', 'meta'])
-            writer.writerow([datetime.utcnow().isoformat(), email, str(meta)])
-
-        # Optional: forward to webhook automation (e.g., Zapier/Make/Sheets)
-        webhook_url = os.getenv('WAITLIST_WEBHOOK_URL')
-        if webhook_url:
-            try:
-                # Send flattened payload for easier Zapier mapping
-                payload = {
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'email': email,
-                    'source': meta.get('source', ''),
-                    'builderStep': meta.get('builderStep', '')
-                }
-                with httpx.Client(timeout=5.0) as client:
-                    client.post(webhook_url, json=payload)
-            except Exception as e:
-                # Don't fail the user if webhook forwarding fails
-                print('Waitlist webhook error:', e)
+        # Durable enqueue only; the pipeline stores and forwards in the background
+        waitlist_queue.enqueue(email, meta, dispatch=bool(waitlist_pipeline.webhook_url))
+        waitlist_pipeline.notify()
 
         return jsonify({'success': True})
     except Exception as e:
         print('Waitlist error:', e)
         return jsonify({'success': False, 'error': 'server_error'}), 500
 
+def waitlist_admin(view):
+    """Require Authorization: Bearer <WAITLIST_ADMIN_TOKEN>; the routes are off when it is unset"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        token = os.getenv('WAITLIST_ADMIN_TOKEN')
+        if not token:
+            return jsonify({'success': False, 'error': 'not_found'}), 404
+        scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer':
+            supplied = ''
+        if not hmac.compare_digest(supplied.strip().encode('utf-8'), token.encode('utf-8')):
+            return jsonify({'success': False, 'error': 'unauthorized'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.get('/api/waitlist/stats')
+@waitlist_admin
+def waitlist_stats():
+    """
+    Signup counts by meta.source and builderStep
+    Query params: email (optional) - also report whether it is signed up
+    """
+    stats = waitlist_store.counts()
+    email = request.args.get('email')
+    if email:
+        stats['email'] = {'address': email, 'signedUp': waitlist_store.contains(email)}
+    return jsonify({'success': True, **stats})
+
+@app.get('/api/waitlist/export')
+@waitlist_admin
+def waitlist_export():
+    """Stream the waitlist as CSV without loading it into memory"""
+    filename = f"waitlist-{datetime.utcnow().strftime('%Y%m%d')}.csv"
+    return Response(waitlist_store.iter_csv(), mimetype='text/csv', headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'Cache-Control': 'no-store',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/api/dividend-yield', methods=['GET'])
 def get_dividend_yield():
     """
@@ -107,8 +336,10 @@ def get_dividend_yield():
             'error': 'Missing required parameter: symbol'
         }), 400
 
+    symbol_popularity.record([symbol])
+
     try:
-        result = fmp_service.get_dividend_yield(symbol)
+        result = market_data.get_dividend_yield(symbol)
 
         if result.get('error'):
             return jsonify(result), 404
@@ -141,8 +372,10 @@ def get_batch_dividend_yields():
             'error': 'symbols must be a non-empty array'
         }), 400
 
+    symbol_popularity.record(symbols)
+
     try:
-        results = fmp_service.get_batch_dividend_yields(symbols)
+        results = market_data.get_batch_dividend_yields(symbols)
         return jsonify(results), 200
 
     except Exception as e:
@@ -151,18 +384,107 @@ def get_batch_dividend_yields():
             'message': str(e)
         }), 500
 
+@app.route('/api/batch-dividend-yields/stream', methods=['POST'])
+def stream_batch_dividend_yields():
+    """
+    Stream dividend yields for multiple tickers as NDJSON, one line per symbol
+    as soon as its lookup finishes, then a final summary line.
+    Body: { "symbols": ["AAPL", "MSFT", "JNJ"] }
+    Lines: {"symbol": "MSFT", "result": {...}} ... {"done": true, "count": 3, "timestamp": "..."}
+    """
+    data = request.get_json()
+
+    if not data or 'symbols' not in data:
+        return jsonify({
+            'error': 'Missing required field: symbols'
+        }), 400
+
+    symbols = data['symbols']
+
+    if not isinstance(symbols, list) or len(symbols) == 0:
+        return jsonify({
+            'error': 'symbols must be a non-empty array'
+        }), 400
+
+    symbol_popularity.record(symbols)
+
+    def generate():
+        count = 0
+        try:
+            for symbol, result in market_data.iter_dividend_yields(symbols):
+                count += 1
+                yield json.dumps({'symbol': symbol, 'result': result}) + '\n'
+        except Exception as e:
+            yield json.dumps({'error': 'Internal server error', 'message': str(e)}) + '\n'
+        yield json.dumps({
+            'done': True,
+            'count': count,
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        # Stop reverse proxies from buffering the stream
+        'X-Accel-Buffering': 'no'
+    })
+
 # --- MCP-style endpoints ---
+def context_session_id(data: t.Optional[dict] = None) -> t.Optional[str]:
+    """Session from the X-Session-Id header, the body's sessionId or ?session=.
+    None when the client sent no valid id: contexts are never keyed on anything
+    another caller could claim, such as the client address.
+    """
+    session_id = request.headers.get('X-Session-Id') or \
+        (data or {}).get('sessionId') or request.args.get('session') or ''
+    if SESSION_ID_RE.match(str(session_id)):
+        return str(session_id)
+    return None
+
+def session_context(session_id: t.Optional[str]) -> dict:
+    return context_store.get(session_id) if session_id else context_store.empty()
+
 @app.route('/api/mcp/update-context', methods=['POST'])
 def mcp_update_context():
     """Front-end posts the current screen context (DOM + appState + URL).
-    Body: { dom: string, appState: object, url: string }
+    Full body: { dom: string, appState: object, url: string }
+    Delta body: { baseVersion: string, appStatePatch?: [JSON Patch ops],
+                  domDelta?: {start, deleteCount, text, length}, url?: string }
+    The body may be gzip/deflate (or br, with brotli installed) compressed.
+    A delta whose baseVersion isn't the stored version gets a 409 and the
+    client resends the full snapshot. Contexts are stored per session.
     """
-    data = request.get_json(force=True, silent=True) or {}
-    LATEST_CONTEXT["dom"] = data.get("dom")
-    LATEST_CONTEXT["app_state"] = data.get("appState")
-    LATEST_CONTEXT["url"] = data.get("url")
-    LATEST_CONTEXT["updated_at"] = int(time.time())
-    return jsonify({"ok": True, "updated_at": LATEST_CONTEXT["updated_at"]})
+    try:
+        data = decode_body(request.get_data(), request.headers.get('Content-Encoding'), MCP_CONTEXT_MAX_BYTES)
+        if not isinstance(data, dict):
+            raise ContextSyncError({"error": "bad_body", "message": "Expected a JSON object"})
+
+        def apply(current: dict) -> dict:
+            if 'baseVersion' not in data:
+                return {"dom": data.get("dom"), "app_state": data.get("appState"), "url": data.get("url")}
+            if current["version"] is None or data['baseVersion'] != current["version"]:
+                raise ContextSyncError({
+                    "error": "version_mismatch",
+                    "message": "Context changed since baseVersion; send a full snapshot",
+                    "version": current["version"]
+                }, 409)
+            app_state = current["app_state"]
+            if data.get("appStatePatch"):
+                app_state = apply_json_patch(app_state, data["appStatePatch"])
+            dom = current["dom"]
+            if data.get("domDelta"):
+                dom = apply_dom_delta(dom, data["domDelta"])
+            return {"dom": dom, "app_state": app_state, "url": data.get("url", current["url"])}
+
+        session_id = context_session_id(data)
+        if session_id is None:
+            raise ContextSyncError({
+                "error": "missing_session",
+                "message": "Send a session id (X-Session-Id header, sessionId or ?session=)"
+            })
+        context = context_store.update(session_id, apply)
+    except ContextSyncError as e:
+        return jsonify(e.payload), e.status
+    return jsonify({"ok": True, "updated_at": context["updated_at"], "version": context["version"]})
 
 @app.route('/api/mcp/resources', methods=['GET'])
 def mcp_resources():
@@ -184,31 +506,157 @@ def mcp_resources():
             "description": "Window location URL of the page",
         },
     ]
-    return jsonify({"resources": resources, "updated_at": LATEST_CONTEXT["updated_at"]})
+    context = session_context(context_session_id())
+    return jsonify({"resources": resources, "updated_at": context["updated_at"]})
 
 @app.route('/api/mcp/read', methods=['GET'])
 def mcp_read():
-    """Read a specific resource content by URI."""
+    """Read a specific resource content by URI for the caller's session."""
     uri = request.args.get('uri', '')
+    context = session_context(context_session_id())
     if uri == 'mcp://screen/dom':
-        return jsonify({"content": LATEST_CONTEXT["dom"], "mime": "text/html"})
+        return jsonify({"content": context["dom"], "mime": "text/html"})
     if uri == 'mcp://screen/app_state':
-        return jsonify({"content": LATEST_CONTEXT["app_state"], "mime": "application/json"})
+        return jsonify({"content": context["app_state"], "mime": "application/json"})
     if uri == 'mcp://screen/url':
-        return jsonify({"content": LATEST_CONTEXT["url"], "mime": "text/plain"})
+        return jsonify({"content": context["url"], "mime": "text/plain"})
     return jsonify({"error": "unknown_uri", "message": f"No resource for {uri}"}), 404
 
+# Time-to-first-token and cancellation stats for streamed chat replies
+chat_ttft = LatencyTracker()
+CHAT_STREAM_STATS = {'streams': 0, 'completed': 0, 'cancelled': 0, 'errors': 0}
+# Streams run on many gthread threads at once
+chat_stream_stats_lock = threading.Lock()
+
+def count_chat_stream(name: str) -> None:
+    with chat_stream_stats_lock:
+        CHAT_STREAM_STATS[name] += 1
+
+def chat_stream_stats() -> dict:
+    p50 = chat_ttft.percentile(50)
+    p95 = chat_ttft.percentile(95)
+    with chat_stream_stats_lock:
+        counters = dict(CHAT_STREAM_STATS)
+    return {
+        **counters,
+        'ttftP50Ms': round(p50 * 1000) if p50 is not None else None,
+        'ttftP95Ms': round(p95 * 1000) if p95 is not None else None,
+    }
+
+def sse_event(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def sse_response(events) -> Response:
+    return Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop reverse proxies from buffering the stream
+        'X-Accel-Buffering': 'no'
+    })
+
+def stream_chat_reply(client, model: str, messages: list, on_complete=None, done_extra=None) -> Response:
+    """Forward completion tokens to the browser as SSE while they are generated.
+    If the browser disconnects, the WSGI server closes this generator and we
+    close the upstream stream so the model stops generating tokens nobody reads.
+    on_complete(reply) is called with the full text once the stream finishes;
+    done_extra is merged into the 'done' event.
+    """
+    started = time.monotonic()
+    stream = client.chat.completions.create(
+        model=model,
+        max_tokens=1024,
+        temperature=0.3,
+        messages=messages,
+        stream=True
+    )
+    count_chat_stream('streams')
+
+    def generate():
+        first_token_at = None
+        outcome = 'cancelled'
+        tokens = []
+        try:
+            for chunk in stream:
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if not token:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.monotonic()
+                    chat_ttft.record(first_token_at - started)
+                    print(f"Chat stream time-to-first-token: {(first_token_at - started) * 1000:.0f}ms")
+                tokens.append(token)
+                yield sse_event('token', {'token': token})
+            outcome = 'completed'
+            if on_complete:
+                on_complete(''.join(tokens))
+            yield sse_event('done', {'usedModel': model, **(done_extra or {})})
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            outcome = 'errors'
+            print(f"OpenAI stream error: {str(e)}")
+            yield sse_event('error', {'reply': f"Error: {str(e)}", 'usedModel': 'error'})
+        finally:
+            stream.response.close()
+            count_chat_stream(outcome)
+            print(f"Chat stream {outcome} after {(time.monotonic() - started) * 1000:.0f}ms")
+
+    return sse_response(generate())
+
+def client_id() -> str:
+    # ProxyFix has already replaced remote_addr with the address the trusted proxy saw
+    return request.remote_addr or 'unknown'
+
+def admitted(bulkhead: Bulkhead):
+    """Run the view only if bulkhead has a slot; otherwise answer 503 with Retry-After.
+    The slot is held until the response is closed, so streamed replies keep it
+    until the last event is sent (or the browser disconnects).
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            client = client_id()
+            try:
+                bulkhead.acquire(client)
+            except BulkheadFull as e:
+                print(f"{bulkhead.name} rejected {client}: {e.reason}")
+                response = jsonify({
+                    "error": "busy",
+                    "message": "Too many requests in progress, please retry shortly.",
+                    # Shown as-is by the chat widgets, which only read 'reply'
+                    "reply": f"I'm handling a lot of questions right now. Please try again in {e.retry_after}s.",
+                    "retryAfter": e.retry_after
+                })
+                response.status_code = 503
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+
+            started = time.monotonic()
+            release = lambda: bulkhead.release(client, time.monotonic() - started)
+            try:
+                response = app.make_response(view(*args, **kwargs))
+            except Exception:
+                release()
+                raise
+            response.call_on_close(release)
+            return response
+        return wrapper
+    return decorator
+
 @app.route('/api/chat', methods=['POST'])
+@admitted(chat_bulkhead)
 def chat():
     """Context-aware chat endpoint that uses userContext for personalized advice.
-    Body: { message: string, history: array, userContext: object }
+    Body: { message: string, history: array, userContext: object, stream?: boolean }
+    With stream: true (or Accept: text/event-stream) the reply is sent as
+    Server-Sent Events: 'token' events as they arrive, then 'done' (or 'error').
     """
     print("=== CHAT ENDPOINT CALLED ===")
     
     data = request.get_json(force=True, silent=True) or {}
     message = data.get('message', '').strip()
     history = data.get('history', [])
-    user_context = data.get('userContext', {})
+    # Trim oversized lists/strings so the snapshot can't blow up the prompt
+    user_context = cap_user_context(data.get('userContext', {}))
     
     print(f"Received message: {message}")
     print(f"Received history length: {len(history)}")
@@ -218,155 +666,49 @@ def chat():
         print("ERROR: Empty message")
         return jsonify({"error": "empty_message"}), 400
 
-    # Format user context into a readable snapshot
-    def format_currency(val):
-        if val is None or val == 0:
-            return "$0"
-        return f"${val:,.0f}"
-    
-    def format_percent(val):
-        if val is None:
-            return "0%"
-        return f"{val}%"
-
-    # Build the financial snapshot string
-    monthly_income = user_context.get('totalMonthlyIncome', 0)
-    monthly_expenses = user_context.get('monthlyExpenses', 0)
-    savings_rate = user_context.get('savingsRate', 0)
-    fire_number = user_context.get('fireNumber', 0)
-    projected_year = user_context.get('projectedFIYear')
-    net_worth = user_context.get('totalNetWorth', 0)
-    
-    # Build expense breakdown string
-    expense_breakdown = user_context.get('expenseBreakdown', [])
-    expense_str = ", ".join([f"{e.get('name', 'Unknown')}: {format_currency(e.get('amount', 0))}" for e in expense_breakdown[:8]]) if expense_breakdown else "No expenses tracked"
-    
-    # Build portfolio string
-    portfolio = user_context.get('portfolio', [])
-    portfolio_str = ", ".join([f"{p.get('symbol', '?')}: {p.get('percent', 0)}% @ {p.get('yield', 0):.1f}% yield" for p in portfolio[:5]]) if portfolio else "No stocks"
-    
-    # Build properties string
-    properties = user_context.get('properties', [])
-    properties_str = ", ".join([f"{p.get('name', 'Property')}: {format_currency(p.get('value', 0))} ({'rented' if p.get('monthlyRent', 0) > 0 else 'primary'})" for p in properties[:3]]) if properties else "No properties"
-
-    # Determine user phase
-    years_to_fi = (projected_year - 2026) if projected_year and projected_year > 2026 else None
-    if years_to_fi and years_to_fi > 20:
-        phase_note = "The user's FI goal is very far away (>20 years). Suggest aggressive optimization strategies."
-    elif years_to_fi and years_to_fi <= 5:
-        phase_note = "The user is close to FI (<5 years). Focus on risk management and withdrawal strategies."
-    else:
-        phase_note = "The user is in the accumulation phase, building wealth steadily."
-
-    # Handle new user (empty data) gracefully
-    if monthly_income == 0 and net_worth == 0:
-        context_section = """
-The user appears to be new or hasn't entered their financial data yet.
-Encourage them to fill in their income, expenses, and assets so you can provide personalized advice.
-For now, give general FIRE guidance and ask clarifying questions about their situation.
-"""
-    else:
-        context_section = f"""
-USER'S LIVE FINANCIAL SNAPSHOT:
-
-Income (Monthly):
-- Job: {format_currency(user_context.get('monthlyJobIncome', 0))}
-- Dividends: {format_currency(user_context.get('monthlyDividendIncome', 0))}
-- Rental: {format_currency(user_context.get('monthlyRentalIncome', 0))}
-- TOTAL: {format_currency(monthly_income)}
-
-Expenses (Monthly): {format_currency(monthly_expenses)}
-- Breakdown: {expense_str}
-
-Savings Rate: {format_percent(savings_rate)}
-
-Net Worth: {format_currency(net_worth)}
-- Portfolio Value: {format_currency(user_context.get('portfolioValue', 0))}
-- Real Estate Equity: {format_currency(user_context.get('realEstateValue', 0))}
-- Retirement Accounts: {format_currency(user_context.get('retirementTotal', 0))}
-- Savings/Cash: {format_currency(user_context.get('savingsTotal', 0))}
-
-Portfolio: {portfolio_str}
-Blended Dividend Yield: {user_context.get('blendedYield', 0):.2f}%
-
-Properties: {properties_str}
-
-FIRE Metrics:
-- FIRE Number (25x expenses): {format_currency(fire_number)}
-- Projected FI Year: {projected_year if projected_year else 'Not calculated'}
-- Years to FI: {years_to_fi if years_to_fi else 'N/A'}
-
-{phase_note}
-"""
-
-    # Determine system prompt based on mode
+    # Streaming (SSE) when asked for explicitly or via the Accept header
+    stream_requested = data.get('stream') is True or \
+        'text/event-stream' in request.headers.get('Accept', '')
+
+    # Determine system prompt based on mode (memoized per distinct userContext)
     mode = data.get('mode', 'financial_advisor')
+    system_prompt = prompt_builder.build(mode, user_context)
+
+    # If OpenAI API key (or a stand-in server) is configured, use it; else return a fallback response.
+    print(f"OpenAI key present: {openai_pool.configured}")
     
-    if mode == 'article_assistant':
-        # Article Context Mode
-        article_title = user_context.get('articleTitle', 'Article')
-        variables = user_context.get('variables', {})
-        
-        # Format variables for the prompt
-        var_str = "\n".join([f"- {k}: {v}" for k, v in variables.items()])
-        
-        system_prompt = f"""You are the author of the article "{article_title}".
-Your goal is to help the reader understand the concepts using THEIR numbers.
-Do not sound like a generic AI. Sound like a helpful, knowledgeable friend explaining the math.
-
-USER'S CUSTOM VARIABLES:
-{var_str}
-
-CRITICAL RULES:
-1. Answer the user's question directly.
-2. Use the variables above in your explanation. If they ask "When can I retire?", calculate it using their specific 'income' and 'expenses' if available.
-3. Keep it brief and conversational.
-4. If the user asks about the article content, refer to the concepts in the article.
-"""
-    else:
-        # Default Financial Advisor Mode
-        system_prompt = f"""You are an expert Financial Independence & Retire Early (FIRE) Advisor.
-Your goal is to help the user reach financial independence faster by analyzing their specific numbers.
-
-{context_section}
-
-CRITICAL RESPONSE RULES:
-1. **BE EXTREMELY BRIEF.** Max 3-4 sentences for simple questions. Max 5-6 bullet points for complex ones.
-2. **NO CALCULATION STEPS.** Give the answer directly, NOT the math. Only show formulas if the user explicitly asks "how did you calculate that" or "show me the math."
-   - Bad: "First I calculated your monthly savings ($5,000), then multiplied by 12..."
-   - Good: "At your current pace, you'll hit FI in **2031** (5 years)."
-3. Reference their **specific numbers** when relevant (savings rate, expenses, net worth).
-4. Use **bold** for key numbers and takeaways.
-5. Skip pleasantries. Get straight to the point.
-6. If they're far from FI (>15 years), give ONE actionable tip, not a lecture.
-7. Assume 4% safe withdrawal rate unless told otherwise."""
-
-    # If OpenAI API key is configured, use it; else return a fallback response.
-    openai_key = os.getenv('OPENAI_API_KEY')
-    print(f"OpenAI key present: {openai_key is not None}")
-    
-    if openai_key:
+    if openai_pool.configured:
         try:
             print("Attempting OpenAI API call...")
-            client = OpenAI(api_key=openai_key)
+            client = openai_pool.get()
             model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
             print(f"Using model: {model}")
 
-            # Construct messages with system prompt, history, and current question
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            # Add valid history messages
-            for msg in history:
-                if isinstance(msg, dict) and 'role' in msg and 'content' in msg:
-                    # Sanitize role to be either 'user' or 'assistant'
-                    role = 'assistant' if msg['role'] not in ['user', 'assistant'] else msg['role']
-                    messages.append({"role": role, "content": str(msg['content'])})
-
-            # Add current user message (no need to repeat context, it's in system prompt)
-            messages.append({
-                "role": "user",
-                "content": message
-            })
+            # System prompt, as much recent history as fits the token budget, then
+            # the current question (no need to repeat context, it's in the system prompt)
+            messages, prompt_report = prompt_assembler.assemble(system_prompt, history, message)
+            prompt_tokens = prompt_report['promptTokens']
+            print(f"Prompt tokens: {prompt_tokens} ({prompt_report['tokenizer']}), "
+                  f"history kept {prompt_report['keptTurns']}/{prompt_report['historyTurns']}"
+                  f"{', older turns summarized' if prompt_report['summarized'] else ''}")
+
+            cached_reply = chat_cache.get(mode, messages)
+            if cached_reply is not None:
+                print("Serving cached chat reply")
+                if stream_requested:
+                    return sse_response([
+                        sse_event('token', {'token': cached_reply}),
+                        sse_event('done', {'usedModel': model, 'cached': True, 'promptTokens': prompt_tokens}),
+                    ])
+                return jsonify({"reply": cached_reply, "usedModel": model, "cached": True,
+                                "promptTokens": prompt_tokens})
+
+            if stream_requested:
+                return stream_chat_reply(
+                    client, model, messages,
+                    on_complete=lambda reply: chat_cache.put(mode, messages, reply),
+                    done_extra={'promptTokens': prompt_tokens}
+                )
 
             response = client.chat.completions.create(
                 model=model,
@@ -378,7 +720,8 @@ CRITICAL RESPONSE RULES:
 
             reply = response.choices[0].message.content
             print(f"Reply: {reply[:100]}...")
-            return jsonify({"reply": reply, "usedModel": model})
+            chat_cache.put(mode, messages, reply)
+            return jsonify({"reply": reply, "usedModel": model, "promptTokens": prompt_tokens})
         except Exception as e:
             print(f"OpenAI API error: {str(e)}")
             print(f"Error type: {type(e)}")
@@ -392,6 +735,11 @@ CRITICAL RESPONSE RULES:
     # Fallback (no OpenAI key)
     print("Using fallback response")
     reply = "OpenAI API key not configured. Set OPENAI_API_KEY in .env file."
+    if stream_requested:
+        return sse_response([
+            sse_event('token', {'token': reply}),
+            sse_event('done', {'usedModel': 'fallback'}),
+        ])
     return jsonify({"reply": reply, "usedModel": "fallback"})
 
 if __name__ == '__main__':
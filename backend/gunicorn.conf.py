@@ -0,0 +1,33 @@
+"""
+Gunicorn settings for the backend (used by the Procfile: gunicorn -c gunicorn.conf.py app:app)
+
+Nearly all request time is spent waiting on FMP, OpenAI or the waitlist webhook,
+so each worker runs a pool of threads (gthread) instead of serving one request
+at a time. Every setting can be overridden from the environment.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+
+# WEB_CONCURRENCY also splits the FMP quota between workers (see app.py).
+# Export the resolved count so the forked workers divide by the number actually running.
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+os.environ['WEB_CONCURRENCY'] = str(workers)
+# gthread: threads per worker handle I/O-bound requests concurrently.
+# sync: one request per worker (the old behaviour, kept for comparison).
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+# (gunicorn silently switches sync to gthread when threads > 1, so pin it to 1)
+threads = int(os.getenv('GUNICORN_THREADS', '8')) if worker_class != 'sync' else 1
+
+# Keep idle browser/proxy connections open briefly so follow-up requests skip the handshake
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+# Long enough for a slow chat completion or a streamed reply
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+
+# Recycle workers now and then so slow leaks can't build up
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
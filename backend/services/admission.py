@@ -0,0 +1,150 @@
+import itertools
+import math
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+
+class BulkheadFull(Exception):
+    """Raised when a request can't be admitted; retry_after is a hint in seconds"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+    """
+    Concurrency limit with a short, bounded, fair wait queue
+
+    At most max_concurrent requests run at once. Up to max_queue more wait
+    (each for at most queue_timeout seconds); beyond that callers are rejected
+    immediately so they fail fast instead of tying up a worker. Each client
+    may hold at most per_client running-or-queued slots, and when a slot frees
+    up it goes to the waiting client with the fewest running requests, so one
+    busy client can't starve the others.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int = 3,
+        max_queue: int = 2,
+        queue_timeout: float = 5.0,
+        per_client: int = 2
+    ):
+        """
+        Args:
+            name: Label for logs and stats
+            max_concurrent: Requests allowed to run at once
+            max_queue: Requests allowed to wait for a slot
+            queue_timeout: Max seconds a request waits before being rejected
+            per_client: Max running + waiting requests per client
+        """
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.per_client = max(1, per_client)
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiters: List[list] = []
+        self._active = 0
+        self._client_active: Counter = Counter()
+        self._client_total: Counter = Counter()
+        # Smoothed seconds a request holds its slot, for Retry-After hints
+        self._avg_hold = 1.0
+        self._counters = {
+            'admitted': 0,
+            'queued': 0,
+            'rejectedQueueFull': 0,
+            'rejectedPerClient': 0,
+            'rejectedTimeout': 0,
+        }
+
+    def acquire(self, client: str) -> None:
+        """
+        Take a slot for client, waiting briefly if all are busy
+
+        Raises:
+            BulkheadFull: Queue full, client over its share, or the wait timed out
+        """
+        with self._cond:
+            if self._client_total[client] >= self.per_client:
+                self._counters['rejectedPerClient'] += 1
+                raise BulkheadFull('per_client', self._retry_after())
+            if self._active < self.max_concurrent and not self._waiters:
+                self._admit(client)
+                return
+            if len(self._waiters) >= self.max_queue:
+                self._counters['rejectedQueueFull'] += 1
+                raise BulkheadFull('queue_full', self._retry_after())
+
+            waiter = [next(self._seq), client]
+            self._waiters.append(waiter)
+            self._client_total[client] += 1
+            self._counters['queued'] += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while True:
+                    if self._active < self.max_concurrent and self._next_waiter() is waiter:
+                        self._waiters.remove(waiter)
+                        self._client_total[client] -= 1
+                        self._admit(client)
+                        # Another slot may still be free for the next waiter
+                        self._cond.notify_all()
+                        return
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiters.remove(waiter)
+                        self._client_total[client] -= 1
+                        self._counters['rejectedTimeout'] += 1
+                        self._cond.notify_all()
+                        raise BulkheadFull('timeout', self._retry_after())
+                    self._cond.wait(remaining)
+            finally:
+                self._forget(client)
+
+    def release(self, client: str, held: float) -> None:
+        """Give back client's slot; held is how long it was used (seconds)"""
+        with self._cond:
+            self._active -= 1
+            self._client_active[client] -= 1
+            self._client_total[client] -= 1
+            self._forget(client)
+            self._avg_hold = 0.8 * self._avg_hold + 0.2 * held
+            self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                **self._counters,
+                'active': self._active,
+                'waiting': len(self._waiters),
+                'maxConcurrent': self.max_concurrent,
+                'maxQueue': self.max_queue,
+                'avgHoldMs': round(self._avg_hold * 1000),
+            }
+
+    def _admit(self, client: str) -> None:
+        self._active += 1
+        self._client_active[client] += 1
+        self._client_total[client] += 1
+        self._counters['admitted'] += 1
+
+    def _next_waiter(self) -> list:
+        # Fewest running requests first, then arrival order
+        return min(self._waiters, key=lambda w: (self._client_active[w[1]], w[0]))
+
+    def _forget(self, client: str) -> None:
+        # Keep the counters from growing one key per client forever
+        if self._client_total[client] <= 0:
+            self._client_total.pop(client, None)
+            self._client_active.pop(client, None)
+
+    def _retry_after(self) -> int:
+        # Roughly how long until the current queue drains
+        backlog = (self._active + len(self._waiters)) / self.max_concurrent
+        return max(1, math.ceil(backlog * self._avg_hold))
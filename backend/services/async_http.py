@@ -0,0 +1,112 @@
+import asyncio
+import os
+import threading
+from typing import Dict, Optional
+
+import httpx
+import requests
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class AsyncHTTPClient:
+    """
+    Pooled httpx.AsyncClient running on its own event loop thread
+
+    Async callers await aget(). Sync callers (the Flask routes and the
+    market data services) use get(), a drop-in for requests.Session.get that
+    schedules the request on the shared loop, so requests from every thread
+    multiplex over the same few keep-alive (HTTP/2 when available) connections.
+    httpx errors are re-raised as the matching requests exceptions so existing
+    error handling keeps working.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """
+        Args:
+            max_connections: Upper bound on open connections
+            max_keepalive_connections: Idle connections kept warm
+            keepalive_expiry: Seconds an idle connection is kept
+            http2: Negotiate HTTP/2 (ignored if the h2 package isn't installed)
+            headers: Default headers sent with every request
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            print("HTTP/2 requested but h2 is not installed; using HTTP/1.1 keep-alive")
+        self.headers = httpx.Headers(headers or {})
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._pid: Optional[int] = None
+
+    async def aget(self, url: str, params: Optional[Dict] = None, timeout: float = 10) -> httpx.Response:
+        """GET on the shared client; must run on this client's loop"""
+        return await self._client.get(url, params=params, headers=self.headers, timeout=timeout)
+
+    def get(self, url: str, params: Optional[Dict] = None, timeout: float = 10) -> httpx.Response:
+        """
+        Blocking GET for sync callers (same call shape as requests.Session.get)
+
+        Raises:
+            requests.exceptions.Timeout: The request timed out
+            requests.exceptions.ConnectionError: Any other transport error
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self.aget(url, params, timeout), loop)
+        try:
+            return future.result()
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    def close(self) -> None:
+        with self._lock:
+            loop, client = self._loop, self._client
+            self._loop = self._client = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        # Started lazily, and again after a fork: gunicorn workers must not
+        # inherit the master's loop thread or its sockets.
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_loop():
+                asyncio.set_event_loop(loop)
+                ready.set()
+                loop.run_forever()
+
+            threading.Thread(target=run_loop, name='async-http', daemon=True).start()
+            ready.wait()
+
+            async def make_client():
+                return httpx.AsyncClient(limits=self.limits, http2=self.http2)
+
+            self._client = asyncio.run_coroutine_threadsafe(make_client(), loop).result()
+            self._loop = loop
+            self._pid = os.getpid()
+            return loop
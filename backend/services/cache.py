@@ -0,0 +1,356 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class CacheBackend:
+    """
+    Storage interface used by TTLCache
+
+    Entries are dicts with 'value', 'expires_at' and 'stale_until' (epoch
+    seconds). Backends own eviction; TTLCache owns freshness and refreshing.
+    """
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU dict bounded by entry count and approximate size"""
+
+    def __init__(self, max_entries: int = 2000, max_bytes: int = 8 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Max number of keys kept before evicting least recently used
+            max_bytes: Approximate memory bound (JSON-encoded size of the values)
+        """
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry['stale_until'] <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        size = len(json.dumps(entry['value'], default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = {**entry, 'size': size}
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted['size']
+                self._evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'evictions': self._evictions,
+                'maxEntries': self.max_entries,
+                'maxBytes': self.max_bytes,
+            }
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry['size']
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    On-disk cache shared by every process that opens the same file
+
+    Gunicorn workers each open their own connection; WAL mode lets readers
+    proceed while one worker writes, and every write is a single atomic
+    INSERT OR REPLACE. Entries past their stale window are purged every
+    PURGE_EVERY writes, and the oldest entries go once max_entries is exceeded.
+    """
+
+    PURGE_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int = 20000):
+        """
+        Args:
+            path: SQLite file (created if missing)
+            max_entries: Max number of rows kept after a purge
+        """
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self._local = threading.local()
+        self._writes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                ' key TEXT PRIMARY KEY,'
+                ' value TEXT NOT NULL,'
+                ' expires_at REAL NOT NULL,'
+                ' stale_until REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_stale_until ON cache (stale_until)')
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            'SELECT value, expires_at, stale_until FROM cache WHERE key = ? AND stale_until > ?',
+            (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'value': json.loads(row[0]),
+            'expires_at': row[1],
+            'stale_until': row[2],
+        }
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at, stale_until) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(entry['value'], default=str), entry['expires_at'], entry['stale_until'])
+            )
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % self.PURGE_EVERY == 0
+        if purge:
+            self.purge()
+
+    def delete(self, key: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def purge(self) -> None:
+        """Drop entries past their stale window, then the oldest beyond max_entries"""
+        conn = self._conn()
+        with conn:
+            expired = conn.execute('DELETE FROM cache WHERE stale_until <= ?', (time.time(),)).rowcount
+            overflow = conn.execute(
+                'DELETE FROM cache WHERE key IN ('
+                ' SELECT key FROM cache ORDER BY stale_until DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            ).rowcount
+        with self._lock:
+            self._evictions += max(0, expired) + max(0, overflow)
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._conn().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        with self._lock:
+            evictions = self._evictions
+        return {
+            'backend': 'sqlite',
+            'entries': entries,
+            'evictions': evictions,
+            'maxEntries': self.max_entries,
+        }
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads, so keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+
+class TTLCache:
+    """Thread-safe cache with per-entry TTLs and stale-while-revalidate over a pluggable backend"""
+
+    def __init__(
+        self,
+        max_entries: int = 2000,
+        max_bytes: int = 8 * 1024 * 1024,
+        backend: Optional[CacheBackend] = None
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Entry bound for the default in-memory backend
+            max_bytes: Approximate memory bound for the default in-memory backend
+            backend: Storage backend (defaults to a MemoryCacheBackend)
+        """
+        self.backend = backend or MemoryCacheBackend(max_entries=max_entries, max_bytes=max_bytes)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._counters = {
+            'hits': 0,
+            'staleHits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refreshErrors': 0,
+        }
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Any]:
+        """
+        Return the cached value for key, or None if missing or expired
+
+        Args:
+            key: Cache key
+            allow_stale: Also return values past their TTL but inside the stale window
+        """
+        entry = self._read(key)
+        fresh = entry is not None and entry['expires_at'] > time.time()
+        with self._lock:
+            if entry is not None and (fresh or allow_stale):
+                self._counters['hits' if fresh else 'staleHits'] += 1
+                return entry['value']
+            self._counters['misses'] += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: float, stale_ttl: float = 0) -> None:
+        """
+        Store value under key
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value (None is never cached)
+            ttl: Seconds the value is served as fresh
+            stale_ttl: Extra seconds the value may be served while a refresh runs
+        """
+        if value is None:
+            return
+        now = time.time()
+        try:
+            self.backend.set(key, {
+                'value': value,
+                'expires_at': now + ttl,
+                'stale_until': now + ttl + stale_ttl,
+            })
+        except Exception as e:
+            print(f"Cache write error for {key}: {e}")
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(key)
+
+    def expires_in(self, key: str) -> Optional[float]:
+        """Seconds until key stops being fresh (negative if stale), None if not cached"""
+        entry = self._read(key)
+        if entry is None:
+            return None
+        return entry['expires_at'] - time.time()
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: float,
+        stale_ttl: float = 0
+    ) -> Any:
+        """
+        Return the cached value for key, calling loader on a miss
+
+        Fresh entries are returned directly. Entries past their TTL but inside the
+        stale window are returned immediately while loader re-runs in a background
+        thread. Otherwise loader runs inline; exceptions propagate and nothing is
+        cached, and a None result is returned but not cached.
+
+        Args:
+            key: Cache key
+            loader: Zero-argument callable producing the value
+            ttl: Seconds the value is served as fresh
+            stale_ttl: Extra seconds a stale value is served while refreshing
+        """
+        entry = self._read(key)
+        if entry is None:
+            with self._lock:
+                self._counters['misses'] += 1
+            value = loader()
+            self.set(key, value, ttl, stale_ttl)
+            return value
+
+        with self._lock:
+            if entry['expires_at'] > time.time():
+                self._counters['hits'] += 1
+                return entry['value']
+            self._counters['staleHits'] += 1
+            start_refresh = key not in self._refreshing
+            if start_refresh:
+                self._refreshing.add(key)
+
+        if start_refresh:
+            threading.Thread(
+                target=self._refresh,
+                args=(key, loader, ttl, stale_ttl),
+                name=f'cache-refresh-{key}',
+                daemon=True
+            ).start()
+        return entry['value']
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters (this process) and backend sizes for the health endpoint"""
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters['hits'] + counters['staleHits'] + counters['misses']
+        hit_rate = (counters['hits'] + counters['staleHits']) / lookups if lookups else 0.0
+        try:
+            backend_stats = self.backend.stats()
+        except Exception as e:
+            backend_stats = {'error': str(e)}
+        return {
+            **counters,
+            'hitRate': round(hit_rate, 3),
+            **backend_stats,
+        }
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        # A broken backend degrades to a cache miss rather than failing the request
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            print(f"Cache read error for {key}: {e}")
+            return None
+
+    def _refresh(self, key: str, loader: Callable[[], Any], ttl: float, stale_ttl: float) -> None:
+        try:
+            value = loader()
+            self.set(key, value, ttl, stale_ttl)
+            with self._lock:
+                self._counters['refreshes'] += 1
+        except Exception as e:
+            print(f"Cache refresh error for {key}: {e}")
+            with self._lock:
+                self._counters['refreshErrors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from .cache import TTLCache
+
+_WORD_RE = re.compile(r"[a-z0-9$%]+(?:\.[0-9]+)?")
+_STOP_WORDS = frozenset(
+    'a an and are as at be can could do does for how i if in is it me my of on or '
+    's should so that the this to was what when which will with would you your'.split()
+)
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case, collapse whitespace and drop trailing punctuation"""
+    text = re.sub(r'\s+', ' ', str(text).strip().lower())
+    return text.rstrip(' ?!.')
+
+
+def embed(text: str, dims: int = 256) -> List[float]:
+    """
+    Cheap local embedding: hashed bag of content words, L2-normalized
+
+    Stop words are dropped and plurals folded, which is enough to match
+    rephrasings like "what's my fire number" and "What is my FIRE number?"
+    without calling an embedding API.
+    """
+    words = [
+        word[:-1] if len(word) > 3 and word.endswith('s') else word
+        for word in _WORD_RE.findall(normalize_text(text))
+        if word not in _STOP_WORDS
+    ]
+    vector = [0.0] * dims
+    for feature in words:
+        digest = hashlib.md5(feature.encode('utf-8')).digest()
+        index = int.from_bytes(digest[:4], 'little') % dims
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector] if norm else vector
+
+
+def cosine(a: List[float], b: List[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+class ChatResponseCache:
+    """
+    Reply cache for /api/chat keyed on the normalized prompt
+
+    The exact key hashes the system prompt, history and message after
+    normalization. With a similarity threshold set, a miss also compares the
+    message's local embedding against cached messages that share the same
+    system prompt and history, and reuses the closest reply above threshold.
+    Only modes listed in enabled_modes are cached.
+    """
+
+    def __init__(
+        self,
+        enabled_modes: Iterable[str],
+        ttl: float = 6 * 60 * 60,
+        max_entries: int = 1000,
+        similarity_threshold: Optional[float] = None,
+        cache: Optional[TTLCache] = None
+    ):
+        """
+        Args:
+            enabled_modes: Chat modes whose replies may be cached (e.g. 'article_assistant')
+            ttl: Seconds a cached reply is served
+            max_entries: Max cached replies (and similarity candidates)
+            similarity_threshold: Cosine similarity needed for a fuzzy hit; None disables it
+            cache: Storage (defaults to an in-memory TTLCache of max_entries)
+        """
+        self.enabled_modes = set(enabled_modes)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.cache = cache or TTLCache(max_entries=max_entries)
+        # context hash -> {message key: embedding}, bounded LRU over contexts
+        self._index: "OrderedDict[str, Dict[str, List[float]]]" = OrderedDict()
+        self._indexed = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'similarHits': 0,
+            'misses': 0,
+            'stores': 0,
+        }
+
+    def enabled(self, mode: str) -> bool:
+        return mode in self.enabled_modes
+
+    def get(self, mode: str, messages: List[Dict]) -> Optional[str]:
+        """
+        Cached reply for this conversation, or None
+
+        Args:
+            mode: Chat mode
+            messages: Full prompt (system, history..., final user message)
+        """
+        if not self.enabled(mode) or not messages:
+            return None
+        context_key = self._context_key(mode, messages[:-1])
+        message = normalize_text(messages[-1].get('content', ''))
+
+        reply = self.cache.get(self._key(context_key, message))
+        if reply is not None:
+            self._count('hits')
+            return reply
+
+        if self.similarity_threshold is not None:
+            reply = self._similar(context_key, message)
+            if reply is not None:
+                self._count('similarHits')
+                return reply
+
+        self._count('misses')
+        return None
+
+    def put(self, mode: str, messages: List[Dict], reply: str) -> None:
+        """Store the reply generated for messages"""
+        if not self.enabled(mode) or not messages or not reply:
+            return
+        context_key = self._context_key(mode, messages[:-1])
+        message = normalize_text(messages[-1].get('content', ''))
+        key = self._key(context_key, message)
+        self.cache.set(key, reply, ttl=self.ttl)
+        self._count('stores')
+
+        if self.similarity_threshold is not None:
+            vector = embed(message)
+            with self._lock:
+                candidates = self._index.setdefault(context_key, {})
+                if key not in candidates:
+                    self._indexed += 1
+                candidates[key] = vector
+                self._index.move_to_end(context_key)
+                while self._indexed > self.max_entries and self._index:
+                    _, dropped = self._index.popitem(last=False)
+                    self._indexed -= len(dropped)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._counters,
+                'modes': sorted(self.enabled_modes),
+                'similarity': self.similarity_threshold,
+            }
+
+    def _similar(self, context_key: str, message: str) -> Optional[str]:
+        vector = embed(message)
+        with self._lock:
+            candidates = list(self._index.get(context_key, {}).items())
+        best_key, best_score = None, self.similarity_threshold
+        for key, candidate in candidates:
+            score = cosine(vector, candidate)
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+        reply = self.cache.get(best_key)
+        if reply is None:
+            # Expired or evicted: forget the candidate too
+            with self._lock:
+                candidates = self._index.get(context_key)
+                if candidates is not None and candidates.pop(best_key, None) is not None:
+                    self._indexed -= 1
+                    if not candidates:
+                        del self._index[context_key]
+        return reply
+
+    @staticmethod
+    def _context_key(mode: str, context: List[Dict]) -> str:
+        normalized = [
+            [m.get('role'), normalize_text(m.get('content', ''))]
+            for m in context
+        ]
+        payload = json.dumps([mode, normalized], separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _key(context_key: str, message: str) -> str:
+        digest = hashlib.sha256(f'{context_key}\n{message}'.encode('utf-8')).hexdigest()
+        return f'chat:{digest}'
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from string import Template
+from typing import Any, Dict
+
+# Year the "years to FI" figure counts from
+CURRENT_YEAR = 2026
+
+NEW_USER_SECTION = """
+The user appears to be new or hasn't entered their financial data yet.
+Encourage them to fill in their income, expenses, and assets so you can provide personalized advice.
+For now, give general FIRE guidance and ask clarifying questions about their situation.
+"""
+
+SNAPSHOT_TEMPLATE = Template("""
+USER'S LIVE FINANCIAL SNAPSHOT:
+
+Income (Monthly):
+- Job: $job_income
+- Dividends: $dividend_income
+- Rental: $rental_income
+- TOTAL: $monthly_income
+
+Expenses (Monthly): $monthly_expenses
+- Breakdown: $expenses
+
+Savings Rate: $savings_rate
+
+Net Worth: $net_worth
+- Portfolio Value: $portfolio_value
+- Real Estate Equity: $real_estate_value
+- Retirement Accounts: $retirement_total
+- Savings/Cash: $savings_total
+
+Portfolio: $portfolio
+Blended Dividend Yield: $blended_yield%
+
+Properties: $properties
+
+FIRE Metrics:
+- FIRE Number (25x expenses): $fire_number
+- Projected FI Year: $projected_year
+- Years to FI: $years_to_fi
+
+$phase_note
+""")
+
+ADVISOR_TEMPLATE = Template("""You are an expert Financial Independence & Retire Early (FIRE) Advisor.
+Your goal is to help the user reach financial independence faster by analyzing their specific numbers.
+
+$context_section
+
+CRITICAL RESPONSE RULES:
+1. **BE EXTREMELY BRIEF.** Max 3-4 sentences for simple questions. Max 5-6 bullet points for complex ones.
+2. **NO CALCULATION STEPS.** Give the answer directly, NOT the math. Only show formulas if the user explicitly asks "how did you calculate that" or "show me the math."
+   - Bad: "First I calculated your monthly savings ($$5,000), then multiplied by 12..."
+   - Good: "At your current pace, you'll hit FI in **2031** (5 years)."
+3. Reference their **specific numbers** when relevant (savings rate, expenses, net worth).
+4. Use **bold** for key numbers and takeaways.
+5. Skip pleasantries. Get straight to the point.
+6. If they're far from FI (>15 years), give ONE actionable tip, not a lecture.
+7. Assume 4% safe withdrawal rate unless told otherwise.""")
+
+ARTICLE_TEMPLATE = Template("""You are the author of the article "$article_title".
+Your goal is to help the reader understand the concepts using THEIR numbers.
+Do not sound like a generic AI. Sound like a helpful, knowledgeable friend explaining the math.
+
+USER'S CUSTOM VARIABLES:
+$variables
+
+CRITICAL RULES:
+1. Answer the user's question directly.
+2. Use the variables above in your explanation. If they ask "When can I retire?", calculate it using their specific 'income' and 'expenses' if available.
+3. Keep it brief and conversational.
+4. If the user asks about the article content, refer to the concepts in the article.
+""")
+
+
+def format_currency(val) -> str:
+    if val is None or val == 0:
+        return "$0"
+    return f"${val:,.0f}"
+
+
+def format_percent(val) -> str:
+    if val is None:
+        return "0%"
+    return f"{val}%"
+
+
+def phase_note(years_to_fi) -> str:
+    if years_to_fi and years_to_fi > 20:
+        return "The user's FI goal is very far away (>20 years). Suggest aggressive optimization strategies."
+    if years_to_fi and years_to_fi <= 5:
+        return "The user is close to FI (<5 years). Focus on risk management and withdrawal strategies."
+    return "The user is in the accumulation phase, building wealth steadily."
+
+
+def render_snapshot(user_context: Dict[str, Any]) -> str:
+    """The financial snapshot section of the advisor prompt"""
+    monthly_income = user_context.get('totalMonthlyIncome', 0)
+    net_worth = user_context.get('totalNetWorth', 0)
+    # Handle new user (empty data) gracefully
+    if monthly_income == 0 and net_worth == 0:
+        return NEW_USER_SECTION
+
+    projected_year = user_context.get('projectedFIYear')
+    years_to_fi = (projected_year - CURRENT_YEAR) if projected_year and projected_year > CURRENT_YEAR else None
+
+    expense_breakdown = user_context.get('expenseBreakdown', [])
+    portfolio = user_context.get('portfolio', [])
+    properties = user_context.get('properties', [])
+
+    return SNAPSHOT_TEMPLATE.substitute(
+        job_income=format_currency(user_context.get('monthlyJobIncome', 0)),
+        dividend_income=format_currency(user_context.get('monthlyDividendIncome', 0)),
+        rental_income=format_currency(user_context.get('monthlyRentalIncome', 0)),
+        monthly_income=format_currency(monthly_income),
+        monthly_expenses=format_currency(user_context.get('monthlyExpenses', 0)),
+        expenses=", ".join(
+            f"{e.get('name', 'Unknown')}: {format_currency(e.get('amount', 0))}" for e in expense_breakdown
+        ) if expense_breakdown else "No expenses tracked",
+        savings_rate=format_percent(user_context.get('savingsRate', 0)),
+        net_worth=format_currency(net_worth),
+        portfolio_value=format_currency(user_context.get('portfolioValue', 0)),
+        real_estate_value=format_currency(user_context.get('realEstateValue', 0)),
+        retirement_total=format_currency(user_context.get('retirementTotal', 0)),
+        savings_total=format_currency(user_context.get('savingsTotal', 0)),
+        portfolio=", ".join(
+            f"{p.get('symbol', '?')}: {p.get('percent', 0)}% @ {p.get('yield', 0):.1f}% yield" for p in portfolio
+        ) if portfolio else "No stocks",
+        blended_yield=f"{user_context.get('blendedYield', 0):.2f}",
+        properties=", ".join(
+            f"{p.get('name', 'Property')}: {format_currency(p.get('value', 0))} "
+            f"({'rented' if p.get('monthlyRent', 0) > 0 else 'primary'})" for p in properties
+        ) if properties else "No properties",
+        fire_number=format_currency(user_context.get('fireNumber', 0)),
+        projected_year=projected_year if projected_year else 'Not calculated',
+        years_to_fi=years_to_fi if years_to_fi else 'N/A',
+        phase_note=phase_note(years_to_fi),
+    )
+
+
+def render_system_prompt(mode: str, user_context: Dict[str, Any]) -> str:
+    """System prompt for a chat mode ('article_assistant' or the default advisor)"""
+    if mode == 'article_assistant':
+        variables = user_context.get('variables', {})
+        return ARTICLE_TEMPLATE.substitute(
+            article_title=user_context.get('articleTitle', 'Article'),
+            variables="\n".join(f"- {k}: {v}" for k, v in variables.items()),
+        )
+    return ADVISOR_TEMPLATE.substitute(context_section=render_snapshot(user_context))
+
+
+class SystemPromptBuilder:
+    """
+    Memoized render_system_prompt
+
+    The browser resends the same userContext with every message of a session,
+    so prompts are cached in a small LRU keyed on a hash of (mode, userContext).
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Args:
+            max_entries: Rendered prompts kept before evicting least recently used
+        """
+        self.max_entries = max(1, max_entries)
+        self._prompts: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'renders': 0}
+
+    def build(self, mode: str, user_context: Dict[str, Any]) -> str:
+        key = self.context_hash(mode, user_context)
+        with self._lock:
+            prompt = self._prompts.get(key)
+            if prompt is not None:
+                self._prompts.move_to_end(key)
+                self._counters['hits'] += 1
+                return prompt
+
+        prompt = render_system_prompt(mode, user_context)
+        with self._lock:
+            self._prompts[key] = prompt
+            self._counters['renders'] += 1
+            while len(self._prompts) > self.max_entries:
+                self._prompts.popitem(last=False)
+        return prompt
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, 'entries': len(self._prompts)}
+
+    @staticmethod
+    def context_hash(mode: str, user_context: Dict[str, Any]) -> str:
+        payload = json.dumps([mode, user_context], sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
@@ -0,0 +1,67 @@
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Callable, Dict
+
+from .cache import TTLCache
+
+
+class SessionContextStore:
+    """
+    Screen context (DOM, appState, URL) per browser session
+
+    Entries live in a TTLCache, so the backend decides the bounds: the memory
+    backend evicts least recently used sessions by count and by the size of
+    their (mostly DOM) payload, the SQLite backend shares sessions across
+    gunicorn workers. Every update gets a fresh opaque version that delta
+    updates must name as their base.
+    """
+
+    def __init__(self, cache: TTLCache, ttl: float = 2 * 60 * 60):
+        """
+        Args:
+            cache: Storage for the per-session snapshots
+            ttl: Seconds an idle session's context is kept
+        """
+        self.cache = cache
+        self.ttl = ttl
+        # Striped locks serialize read-modify-write per session within this process
+        self._locks = [threading.Lock() for _ in range(64)]
+
+    @staticmethod
+    def empty() -> Dict[str, Any]:
+        return {'updated_at': None, 'version': None, 'dom': None, 'app_state': None, 'url': None}
+
+    def get(self, session_id: str) -> Dict[str, Any]:
+        """The session's context (all fields None if nothing was pushed yet)"""
+        return self.cache.get(self._key(session_id)) or self.empty()
+
+    def update(self, session_id: str, apply: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Replace the session's context with apply(current) and stamp a new version
+
+        Args:
+            session_id: Browser session id
+            apply: Returns the new {dom, app_state, url}; exceptions propagate and nothing is stored
+
+        Returns:
+            The stored context
+        """
+        key = self._key(session_id)
+        with self._locks[zlib.crc32(key.encode('utf-8')) % len(self._locks)]:
+            current = self.cache.get(key) or self.empty()
+            context = {
+                **apply(current),
+                'updated_at': int(time.time()),
+                'version': uuid.uuid4().hex[:12],
+            }
+            self.cache.set(key, context, ttl=self.ttl)
+        return context
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f'context:{session_id}'
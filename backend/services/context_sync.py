@@ -0,0 +1,157 @@
+import copy
+import json
+import zlib
+from typing import Any, Dict, List, Optional
+
+try:
+    import brotli
+    # Bounded decompression needs Decompressor.can_accept_more_data (brotli >= 1.2)
+    BROTLI_AVAILABLE = hasattr(brotli.Decompressor(), 'can_accept_more_data')
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+
+class ContextSyncError(Exception):
+    """Raised when a context update can't be applied; payload/status go back to the client"""
+
+    def __init__(self, payload: Dict, status: int = 400):
+        super().__init__(payload.get('message', payload.get('error')))
+        self.payload = payload
+        self.status = status
+
+
+def decode_body(raw: bytes, content_encoding: Optional[str], max_bytes: int) -> Any:
+    """
+    Decompress (gzip, deflate or br) and parse a JSON request body
+
+    Args:
+        raw: Request body as received
+        content_encoding: Content-Encoding header value, if any
+        max_bytes: Max decompressed size (guards against compression bombs)
+    """
+    encoding = (content_encoding or 'identity').strip().lower()
+    try:
+        if encoding in ('identity', ''):
+            data = raw
+        elif encoding in ('gzip', 'x-gzip'):
+            data = _bounded(zlib.decompressobj(16 + zlib.MAX_WBITS), raw, max_bytes)
+        elif encoding == 'deflate':
+            data = _bounded(zlib.decompressobj(), raw, max_bytes)
+        elif encoding == 'br' and BROTLI_AVAILABLE:
+            data = _bounded_brotli(raw, max_bytes)
+        else:
+            raise ContextSyncError({
+                'error': 'unsupported_encoding',
+                'message': f'Content-Encoding {encoding} is not supported'
+            }, 415)
+    except zlib.error as e:
+        raise ContextSyncError({'error': 'bad_body', 'message': f'Could not decompress body: {e}'})
+    except ContextSyncError:
+        raise
+    except Exception as e:
+        # brotli.error and friends
+        raise ContextSyncError({'error': 'bad_body', 'message': f'Could not decompress body: {e}'})
+
+    if len(data) > max_bytes:
+        raise ContextSyncError({'error': 'too_large', 'message': f'Context exceeds {max_bytes} bytes'}, 413)
+    try:
+        return json.loads(data or b'{}')
+    except ValueError as e:
+        raise ContextSyncError({'error': 'bad_json', 'message': str(e)})
+
+
+def _bounded(decompressor, raw: bytes, max_bytes: int) -> bytes:
+    data = decompressor.decompress(raw, max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ContextSyncError({'error': 'too_large', 'message': f'Context exceeds {max_bytes} bytes'}, 413)
+    return data
+
+
+def _bounded_brotli(raw: bytes, max_bytes: int) -> bytes:
+    # Ask for at most max_bytes + 1 bytes in total, so a bomb stops as soon as it
+    # passes the limit instead of being inflated in full first
+    decompressor = brotli.Decompressor()
+    data = bytearray()
+    pending = raw
+    while True:
+        data += decompressor.process(pending, output_buffer_limit=max_bytes + 1 - len(data))
+        pending = b''
+        if len(data) > max_bytes:
+            raise ContextSyncError({'error': 'too_large', 'message': f'Context exceeds {max_bytes} bytes'}, 413)
+        if decompressor.is_finished() or decompressor.can_accept_more_data():
+            return bytes(data)
+
+
+def apply_json_patch(document: Any, operations: List[Dict]) -> Any:
+    """
+    Apply RFC 6902 add/remove/replace operations and return the patched copy
+
+    The input is never modified, so a failed patch leaves the stored snapshot intact.
+    """
+    if not isinstance(operations, list):
+        raise ContextSyncError({'error': 'bad_patch', 'message': 'appStatePatch must be a list'})
+    root = {'': copy.deepcopy(document)}
+    for op in operations:
+        try:
+            kind = op['op']
+            parent, key = _resolve(root, op['path'])
+            if kind == 'remove':
+                del parent[key]
+            elif kind in ('add', 'replace'):
+                value = op['value']
+                if isinstance(parent, list) and kind == 'add':
+                    index = len(parent) if key is None else key
+                    if not 0 <= index <= len(parent):
+                        raise IndexError(index)
+                    parent.insert(index, value)
+                elif isinstance(parent, list):
+                    parent[key] = value
+                else:
+                    if kind == 'replace' and key not in parent:
+                        raise KeyError(key)
+                    parent[key] = value
+            else:
+                raise ValueError(f"unsupported op {kind!r}")
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise ContextSyncError({'error': 'bad_patch', 'message': f'Cannot apply {op}: {e}'}, 409)
+    return root['']
+
+
+def _resolve(root: Dict, pointer: str):
+    # Walk a JSON pointer to (container, last key); the root lives under key ''
+    if pointer == '':
+        return root, ''
+    if not pointer.startswith('/'):
+        raise ValueError(f'bad pointer {pointer!r}')
+    tokens = [t.replace('~1', '/').replace('~0', '~') for t in pointer[1:].split('/')]
+    parent = root['']
+    for token in tokens[:-1]:
+        parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+    last = tokens[-1]
+    if isinstance(parent, list):
+        return parent, None if last == '-' else int(last)
+    return parent, last
+
+
+def apply_dom_delta(dom: str, delta: Dict) -> str:
+    """
+    Apply a single splice {start, deleteCount, text, length} to the stored DOM
+
+    Offsets are UTF-16 code units (JavaScript string indices), so the splice is
+    done on the UTF-16 encoding. length, when given, is the expected result
+    length and catches a client and server that have drifted apart.
+    """
+    try:
+        start = int(delta['start'])
+        delete_count = int(delta['deleteCount'])
+        text = str(delta.get('text', ''))
+    except (KeyError, TypeError, ValueError) as e:
+        raise ContextSyncError({'error': 'bad_delta', 'message': f'Invalid domDelta: {e}'})
+
+    units = (dom or '').encode('utf-16-le', 'surrogatepass')
+    if start < 0 or delete_count < 0 or 2 * (start + delete_count) > len(units):
+        raise ContextSyncError({'error': 'bad_delta', 'message': 'domDelta is outside the stored DOM'}, 409)
+    spliced = units[:2 * start] + text.encode('utf-16-le', 'surrogatepass') + units[2 * (start + delete_count):]
+    if 'length' in delta and len(spliced) != 2 * int(delta['length']):
+        raise ContextSyncError({'error': 'bad_delta', 'message': 'DOM length mismatch after delta'}, 409)
+    return spliced.decode('utf-16-le', 'surrogatepass')
@@ -0,0 +1,105 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class DividendStore:
+    """
+    Local SQLite time series of per-symbol dividend events
+
+    Events are keyed by (symbol, ex-date) so re-inserting an overlapping
+    upstream page is idempotent, except that a corrected amount replaces the
+    stored one. A sync row per symbol records when it was
+    last checked upstream, which lets the service skip the network entirely
+    while the local copy is recent and otherwise fetch only the newest page.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite file (created if missing); safe to share across workers
+        """
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS dividends ('
+                ' symbol TEXT NOT NULL,'
+                ' date TEXT NOT NULL,'
+                ' dividend REAL NOT NULL,'
+                ' record TEXT NOT NULL,'
+                ' PRIMARY KEY (symbol, date))'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS dividend_sync ('
+                ' symbol TEXT PRIMARY KEY,'
+                ' last_checked REAL NOT NULL)'
+            )
+
+    def last_checked(self, symbol: str) -> Optional[float]:
+        """Epoch seconds of the last upstream sync, or None if never synced"""
+        row = self._conn().execute(
+            'SELECT last_checked FROM dividend_sync WHERE symbol = ?', (symbol,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def latest_date(self, symbol: str) -> Optional[str]:
+        """Most recent stored ex-date (YYYY-MM-DD), or None if no events are stored"""
+        row = self._conn().execute(
+            'SELECT MAX(date) FROM dividends WHERE symbol = ?', (symbol,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def save(self, symbol: str, events: List[Dict]) -> int:
+        """
+        Store events and mark the symbol as checked, in one transaction
+
+        Args:
+            symbol: Upper-case ticker
+            events: FMP dividend records (need 'date' and 'dividend')
+
+        Returns:
+            Number of events that were new or whose stored record changed
+        """
+        rows = [
+            (symbol, str(e['date']), float(e.get('dividend') or 0), json.dumps(e))
+            for e in events if e.get('date')
+        ]
+        conn = self._conn()
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT INTO dividends (symbol, date, dividend, record) VALUES (?, ?, ?, ?)'
+                ' ON CONFLICT (symbol, date) DO UPDATE SET dividend = excluded.dividend, record = excluded.record'
+                ' WHERE dividend != excluded.dividend OR record != excluded.record',
+                rows
+            )
+            changed = conn.total_changes - before
+            conn.execute(
+                'INSERT OR REPLACE INTO dividend_sync (symbol, last_checked) VALUES (?, ?)',
+                (symbol, time.time())
+            )
+        return changed
+
+    def recent(self, symbol: str, limit: int) -> List[Dict]:
+        """The newest limit events for symbol, newest first"""
+        rows = self._conn().execute(
+            'SELECT record FROM dividends WHERE symbol = ? ORDER BY date DESC LIMIT ?',
+            (symbol, limit)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads, so keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
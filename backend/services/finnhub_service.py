@@ -1,25 +1,43 @@
 import requests
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
 
+from .async_http import AsyncHTTPClient
+from .rate_limit import RateGovernor, RateLimitExceeded
+
 class FinnhubService:
     """Service to interact with Finnhub API for stock data"""
     
     BASE_URL = "https://finnhub.io/api/v1"
     
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        governor: Optional[RateGovernor] = None,
+        http_client: Optional[AsyncHTTPClient] = None
+    ):
         """
         Initialize Finnhub service
         
         Args:
             api_key: Finnhub API key
+            governor: Optional client-side rate limiter shared by all Finnhub calls
+            http_client: Optional pooled async client used instead of a requests.Session
         """
         self.api_key = api_key
-        self.session = requests.Session()
+        self.governor = governor
+        self.session = http_client if http_client is not None else requests.Session()
         self.session.headers.update({
             'X-Finnhub-Token': self.api_key
         })
     
+    def _get(self, url: str, params: Dict) -> requests.Response:
+        """GET through the rate governor (when configured) so bursts stay within quota"""
+        if self.governor is None:
+            return self.session.get(url, params=params, timeout=10)
+        return self.governor.request(lambda: self.session.get(url, params=params, timeout=10))
+    
     def get_dividend_yield(self, symbol: str) -> Dict:
         """
         Get dividend yield for a stock symbol
@@ -35,7 +53,7 @@ class FinnhubService:
             quote_url = f"{self.BASE_URL}/quote"
             quote_params = {'symbol': symbol}
             
-            quote_response = self.session.get(quote_url, params=quote_params, timeout=10)
+            quote_response = self._get(quote_url, quote_params)
             
             if quote_response.status_code == 429:
                 return {
@@ -59,7 +77,7 @@ class FinnhubService:
                 'metric': 'all'
             }
             
-            response = self.session.get(metrics_url, params=params, timeout=10)
+            response = self._get(metrics_url, params)
             
             if response.status_code != 200:
                 return {
@@ -131,6 +149,13 @@ class FinnhubService:
                 'source': 'finnhub'
             }
             
+        except RateLimitExceeded:
+            return {
+                'error': 'Rate limit exceeded',
+                'message': 'Too many requests. Please try again later.',
+                # Shed locally by the rate governor: not a sign the provider is unhealthy
+                'shed': True
+            }
         except requests.exceptions.Timeout:
             return {
                 'error': 'Request timeout',
@@ -148,28 +173,44 @@ class FinnhubService:
                 'message': str(e)
             }
 
-    def get_batch_dividend_yields(self, symbols: List[str]) -> Dict:
+    def get_batch_dividend_yields(self, symbols: List[str], timeout: Optional[float] = None) -> Dict:
         """
         Get dividend yields for multiple symbols
         
         Args:
             symbols: List of stock ticker symbols
+            timeout: Seconds the batch may take; lookups not started by then are
+                reported as timed out
             
         Returns:
             Dict with results for each symbol
         """
         results = {}
+        timed_out = []
+        started = time.monotonic()
         
         for symbol in symbols:
             symbol = symbol.strip().upper()
-            if symbol:
-                results[symbol] = self.get_dividend_yield(symbol)
+            if not symbol or symbol in results:
+                continue
+            if timeout is not None and time.monotonic() - started >= timeout:
+                timed_out.append(symbol)
+                results[symbol] = {
+                    'error': 'Request timeout',
+                    'message': f'Lookup for {symbol} did not start within {timeout:.0f}s'
+                }
+                continue
+            results[symbol] = self.get_dividend_yield(symbol)
         
-        return {
+        response = {
             'results': results,
             'count': len(results),
             'timestamp': datetime.utcnow().isoformat() + 'Z'
         }
+        if timed_out:
+            response['partial'] = True
+            response['timedOut'] = timed_out
+        return response
     
     def search_symbol(self, query: str) -> List[Dict]:
         """
@@ -185,7 +226,7 @@ class FinnhubService:
             search_url = f"{self.BASE_URL}/search"
             params = {'q': query}
             
-            response = self.session.get(search_url, params=params, timeout=10)
+            response = self._get(search_url, params)
             
             if response.status_code != 200:
                 return []
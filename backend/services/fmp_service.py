@@ -1,72 +1,118 @@
 import requests
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .async_http import AsyncHTTPClient
+from .cache import TTLCache
+from .dividend_store import DividendStore
+from .rate_limit import RateGovernor, RateLimitExceeded
+from .singleflight import SingleFlight
+
+
+class FMPAPIError(Exception):
+    """FMP returned an error status; payload is the error dict returned to callers"""
+    
+    def __init__(self, payload: Dict):
+        super().__init__(payload.get('message', payload.get('error')))
+        self.payload = payload
+
 
 class FMPService:
     """Service to interact with Financial Modeling Prep API for stock data"""
     
     BASE_URL = "https://financialmodelingprep.com/stable"
+    # Max symbols per multi-symbol quote request (keeps URLs a sane length)
+    QUOTE_CHUNK_SIZE = 50
+    # Events fetched on an incremental dividend refresh, and events served from the store
+    INCREMENTAL_LIMIT = 4
+    DIVIDEND_HISTORY_LIMIT = 8
+    
+    # Cache lifetimes (seconds). Dividend history changes quarterly, prices move.
+    DIVIDEND_TTL = 12 * 60 * 60
+    DIVIDEND_STALE_TTL = 24 * 60 * 60
+    PRICE_TTL = 5 * 60
+    PRICE_STALE_TTL = 15 * 60
     
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        max_workers: int = 8,
+        batch_timeout: float = 20.0,
+        cache: Optional[TTLCache] = None,
+        dividend_ttl: Optional[float] = None,
+        price_ttl: Optional[float] = None,
+        governor: Optional[RateGovernor] = None,
+        http_client: Optional[AsyncHTTPClient] = None,
+        dividend_store: Optional[DividendStore] = None,
+        base_url: Optional[str] = None
+    ):
         """
         Initialize FMP service
         
         Args:
             api_key: Financial Modeling Prep API key
+            max_workers: Max symbols looked up concurrently in a batch
+            batch_timeout: Seconds a batch waits before returning partial results
+            cache: Optional cache for dividend series and prices
+            dividend_ttl: Seconds a cached dividend series is fresh (default DIVIDEND_TTL)
+            price_ttl: Seconds a cached price is fresh (default PRICE_TTL)
+            governor: Optional client-side rate limiter shared by all FMP calls
+            http_client: Optional pooled async client used instead of a requests.Session
+            dividend_store: Optional local dividend history, refreshed incrementally
+            base_url: API root (default BASE_URL); point at a stub server for load tests
         """
         self.api_key = api_key
-        self.session = requests.Session()
+        self.base_url = (base_url or self.BASE_URL).rstrip('/')
+        self.max_workers = max(1, max_workers)
+        self.batch_timeout = batch_timeout
+        self.cache = cache
+        self.dividend_ttl = self.DIVIDEND_TTL if dividend_ttl is None else dividend_ttl
+        self.dividend_stale_ttl = self.DIVIDEND_STALE_TTL
+        self.price_ttl = self.PRICE_TTL if price_ttl is None else price_ttl
+        self.price_stale_ttl = self.PRICE_STALE_TTL
+        # Deduplicates concurrent upstream fetches for the same symbol
+        self.flight = SingleFlight()
+        self.governor = governor
+        self.dividend_store = dividend_store
+        if http_client is not None:
+            self.session = http_client
+        else:
+            self.session = requests.Session()
+            # Size the connection pool to the batch fan-out so concurrent lookups
+            # reuse warm connections instead of discarding them.
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=self.max_workers,
+                pool_maxsize=self.max_workers
+            )
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
     
-    def get_dividend_yield(self, symbol: str) -> Dict:
+    def _get(self, url: str, params: Dict) -> requests.Response:
+        """GET through the rate governor (when configured) so bursts stay within quota"""
+        if self.governor is None:
+            return self.session.get(url, params=params, timeout=10)
+        return self.governor.request(lambda: self.session.get(url, params=params, timeout=10))
+
+    def get_dividend_yield(self, symbol: str, price: Optional[float] = None) -> Dict:
         """
         Get dividend yield for a stock symbol
         
         Args:
             symbol: Stock ticker symbol (e.g., 'AAPL')
+            price: Current price if already known (e.g. from a bulk quote);
+                when omitted the price is fetched from /quote
             
         Returns:
             Dict with symbol, dividendYield, and metadata
         """
         try:
-            # Use FMP stable API endpoint for dividends
-            dividends_url = f"{self.BASE_URL}/dividends"
-            params = {
-                'symbol': symbol,
-                'apikey': self.api_key
-            }
-            
-            print(f"\n=== FMP API Request (Dividends) ===")
-            print(f"URL: {dividends_url}")
-            print(f"Symbol: {symbol}")
-            print(f"API Key (first 10 chars): {self.api_key[:10]}...")
-            
-            response = self.session.get(dividends_url, params=params, timeout=10)
-            
-            print(f"Status Code: {response.status_code}")
-            print(f"Response: {response.text[:500]}")
-            
-            if response.status_code == 429:
-                return {
-                    'error': 'Rate limit exceeded',
-                    'message': 'Too many requests. Please try again later.'
-                }
-            
-            if response.status_code == 403:
-                return {
-                    'error': 'Invalid API key',
-                    'message': 'Please check your FMP API key'
-                }
-            
-            if response.status_code != 200:
-                return {
-                    'error': 'API error',
-                    'message': f'Could not fetch data for {symbol}. Status: {response.status_code}'
-                }
-            
-            data = response.json()
+            data = self._get_dividends(symbol)
             
             # Check if we got valid dividend data
-            if not data or not isinstance(data, list) or len(data) == 0:
+            if not data:
                 print(f"No dividend data found for {symbol}, returning 0")
                 return {
                     'symbol': symbol.upper(),
@@ -77,44 +123,31 @@ class FMPService:
                 }
             
             # We need the current stock price to calculate yield
-            quote_url = f"{self.BASE_URL}/quote"
-            quote_params = {
-                'symbol': symbol,
-                'apikey': self.api_key
-            }
+            current_price = price if price is not None else self._get_price(symbol)
             
-            quote_response = self.session.get(quote_url, params=quote_params, timeout=10)
-            
-            print(f"\n=== FMP API Request (Quote) ===")
-            print(f"Quote Status Code: {quote_response.status_code}")
-            
-            if quote_response.status_code == 200:
-                quote_data = quote_response.json()
-                if quote_data and len(quote_data) > 0:
-                    current_price = quote_data[0].get('price', 0)
-                    
-                    # Calculate annual dividend yield
-                    # Get all dividends from the past year and sum them (last 4 quarters)
-                    annual_total = sum(d.get('dividend', 0) for d in data[:4])
-                    
-                    if current_price > 0 and annual_total > 0:
-                        dividend_yield = (annual_total / current_price) * 100
-                    else:
-                        dividend_yield = 0.0
-                    
-                    print(f"\n=== FMP Data for {symbol} ===")
-                    print(f"Annual Dividend: ${annual_total}")
-                    print(f"Current Price: ${current_price}")
-                    print(f"Dividend Yield: {dividend_yield}%")
-                    
-                    return {
-                        'symbol': symbol.upper(),
-                        'dividendYield': round(float(dividend_yield), 2),
-                        'lastUpdated': datetime.utcnow().isoformat() + 'Z',
-                        'source': 'fmp',
-                        'price': current_price,
-                        'annualDividend': round(annual_total, 2)
-                    }
+            if current_price is not None:
+                # Calculate annual dividend yield
+                # Get all dividends from the past year and sum them (last 4 quarters)
+                annual_total = sum(d.get('dividend', 0) for d in data[:4])
+                
+                if current_price > 0 and annual_total > 0:
+                    dividend_yield = (annual_total / current_price) * 100
+                else:
+                    dividend_yield = 0.0
+                
+                print(f"\n=== FMP Data for {symbol} ===")
+                print(f"Annual Dividend: ${annual_total}")
+                print(f"Current Price: ${current_price}")
+                print(f"Dividend Yield: {dividend_yield}%")
+                
+                return {
+                    'symbol': symbol.upper(),
+                    'dividendYield': round(float(dividend_yield), 2),
+                    'lastUpdated': datetime.utcnow().isoformat() + 'Z',
+                    'source': 'fmp',
+                    'price': current_price,
+                    'annualDividend': round(annual_total, 2)
+                }
             
             # Fallback if we couldn't get price
             return {
@@ -125,6 +158,15 @@ class FMPService:
                 'message': 'Could not calculate yield without price data'
             }
             
+        except FMPAPIError as e:
+            return e.payload
+        except RateLimitExceeded:
+            return {
+                'error': 'Rate limit exceeded',
+                'message': 'Too many requests. Please try again later.',
+                # Shed locally by the rate governor: not a sign the provider is unhealthy
+                'shed': True
+            }
         except requests.exceptions.Timeout:
             return {
                 'error': 'Request timeout',
@@ -145,28 +187,371 @@ class FMPService:
                 'message': str(e)
             }
 
-    def get_batch_dividend_yields(self, symbols: List[str]) -> Dict:
+    def _get_dividends(self, symbol: str) -> List[Dict]:
+        """
+        Dividend history for symbol, served from the cache when one is configured
+        
+        Concurrent misses for the same symbol share a single upstream request.
+        """
+        key = f'dividends:{symbol.upper()}'
+        
+        def load():
+            return self.flight.do(key, lambda: self._load_dividends(symbol))
+        
+        if self.cache is None:
+            return load()
+        return self.cache.get_or_load(
+            key,
+            load,
+            ttl=self.dividend_ttl,
+            stale_ttl=self.dividend_stale_ttl
+        )
+
+    def refresh_dividends(self, symbol: str) -> bool:
+        """
+        Reload a symbol's dividend series into the cache ahead of expiry (used by the prewarmer)
+        
+        Always checks upstream, even if the dividend store was synced within
+        dividend_ttl, so the entry cached for another full TTL really is fresh.
+        
+        Returns:
+            True if this call went upstream, False if it joined a lookup already in flight
+        """
+        key = f'dividends:{symbol.upper()}'
+        fetched = []
+        
+        def load():
+            fetched.append(True)
+            return self._load_dividends(symbol, force=True)
+        
+        events = self.flight.do(key, load)
+        if not fetched:
+            # Whoever started the in-flight lookup caches its result
+            return False
+        if self.cache is not None:
+            self.cache.set(key, events, ttl=self.dividend_ttl, stale_ttl=self.dividend_stale_ttl)
+        return True
+
+    def _load_dividends(self, symbol: str, force: bool = False) -> List[Dict]:
+        """
+        Dividend history (newest first), kept in the local store when one is configured
+        
+        A symbol synced within dividend_ttl is answered from the store without any
+        upstream call unless force is set. Otherwise only the newest INCREMENTAL_LIMIT events are
+        fetched and merged (corrected amounts replace stored ones); the full history is downloaded only for symbols never
+        seen before, or when the newest page doesn't overlap what is stored.
+        
+        Args:
+            symbol: Stock ticker symbol
+            force: Fetch upstream even if the store was synced within dividend_ttl
+        """
+        if self.dividend_store is None:
+            return self._fetch_dividends(symbol)
+        
+        symbol = symbol.upper()
+        last_checked = self.dividend_store.last_checked(symbol)
+        if not force and last_checked is not None and time.time() - last_checked < self.dividend_ttl:
+            return self.dividend_store.recent(symbol, self.DIVIDEND_HISTORY_LIMIT)
+        
+        latest = self.dividend_store.latest_date(symbol)
+        if last_checked is None:
+            events = self._fetch_dividends(symbol)
+        else:
+            events = self._fetch_dividends(symbol, limit=self.INCREMENTAL_LIMIT)
+            newer = [e for e in events if latest is None or str(e.get('date', '')) > latest]
+            if latest is not None and len(newer) == len(events) == self.INCREMENTAL_LIMIT:
+                # Every event on the page is new, so there may be a gap: refetch it all
+                events = self._fetch_dividends(symbol)
+            # Otherwise save the whole page: overlapping ex-dates carry upstream corrections
+        
+        changed = self.dividend_store.save(symbol, events)
+        print(f"Dividend store: {symbol} {changed} new or corrected event(s)")
+        return self.dividend_store.recent(symbol, self.DIVIDEND_HISTORY_LIMIT)
+
+    def _fetch_dividends(self, symbol: str, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Fetch the dividend history (newest first) for a symbol from /dividends
+        
+        Args:
+            symbol: Stock ticker symbol
+            limit: Only fetch the newest limit events
+        
+        Returns:
+            List of dividend events, empty if the symbol pays none
+            
+        Raises:
+            FMPAPIError: FMP answered with an error status
+        """
+        # Use FMP stable API endpoint for dividends
+        dividends_url = f"{self.base_url}/dividends"
+        params = {
+            'symbol': symbol,
+            'apikey': self.api_key
+        }
+        if limit is not None:
+            params['limit'] = limit
+        
+        print(f"\n=== FMP API Request (Dividends) ===")
+        print(f"URL: {dividends_url}")
+        print(f"Symbol: {symbol}")
+        print(f"API Key (first 10 chars): {self.api_key[:10]}...")
+        
+        response = self._get(dividends_url, params)
+        
+        print(f"Status Code: {response.status_code}")
+        print(f"Response: {response.text[:500]}")
+        
+        if response.status_code == 429:
+            raise FMPAPIError({
+                'error': 'Rate limit exceeded',
+                'message': 'Too many requests. Please try again later.'
+            })
+        
+        if response.status_code == 403:
+            raise FMPAPIError({
+                'error': 'Invalid API key',
+                'message': 'Please check your FMP API key'
+            })
+        
+        if response.status_code != 200:
+            raise FMPAPIError({
+                'error': 'API error',
+                'message': f'Could not fetch data for {symbol}. Status: {response.status_code}'
+            })
+        
+        data = response.json()
+        if not data or not isinstance(data, list):
+            return []
+        return data
+
+    def _get_price(self, symbol: str) -> Optional[float]:
+        """
+        Current price for symbol, served from the cache when one is configured
+        
+        Concurrent misses for the same symbol share a single upstream request.
+        """
+        key = f'price:{symbol.upper()}'
+        
+        def load():
+            return self.flight.do(key, lambda: self._get_quote_price(symbol))
+        
+        if self.cache is None:
+            return load()
+        return self.cache.get_or_load(
+            key,
+            load,
+            ttl=self.price_ttl,
+            stale_ttl=self.price_stale_ttl
+        )
+
+    def _get_quote_price(self, symbol: str) -> Optional[float]:
+        """
+        Fetch the current price for a single symbol from /quote
+        
+        Returns:
+            Price, or None if FMP returned no quote
+        """
+        quote_url = f"{self.base_url}/quote"
+        quote_params = {
+            'symbol': symbol,
+            'apikey': self.api_key
+        }
+        
+        quote_response = self._get(quote_url, quote_params)
+        
+        print(f"\n=== FMP API Request (Quote) ===")
+        print(f"Quote Status Code: {quote_response.status_code}")
+        
+        if quote_response.status_code == 200:
+            quote_data = quote_response.json()
+            if quote_data and len(quote_data) > 0:
+                return quote_data[0].get('price', 0)
+        return None
+
+    def get_quotes(self, symbols: List[str], use_cached: bool = True) -> Dict[str, float]:
+        """
+        Fetch current prices for many symbols with FMP's multi-symbol quote endpoint
+        
+        Symbols are sent QUOTE_CHUNK_SIZE at a time, so a whole portfolio costs
+        one or two requests instead of one per symbol.
+        
+        Args:
+            symbols: List of normalized (upper-case) ticker symbols
+            use_cached: Serve fresh cached prices; False refetches every symbol
+                (the fetched prices are still written to the cache)
+            
+        Returns:
+            Dict of symbol -> price. Symbols missing from the response (or whose
+            chunk failed) are left out so callers can fall back to /quote.
+        """
+        prices = {}
+        missing = symbols
+        if self.cache is not None and use_cached:
+            missing = []
+            for symbol in symbols:
+                cached_price = self.cache.get(f'price:{symbol}')
+                if cached_price is None:
+                    missing.append(symbol)
+                else:
+                    prices[symbol] = cached_price
+        
+        quote_url = f"{self.base_url}/batch-quote"
+        
+        for i in range(0, len(missing), self.QUOTE_CHUNK_SIZE):
+            chunk = missing[i:i + self.QUOTE_CHUNK_SIZE]
+            params = {
+                'symbols': ','.join(chunk),
+                'apikey': self.api_key
+            }
+            try:
+                response = self._get(quote_url, params)
+                
+                print(f"\n=== FMP API Request (Batch Quote) ===")
+                print(f"Symbols: {len(chunk)}, Status Code: {response.status_code}")
+                
+                if response.status_code != 200:
+                    continue
+                
+                data = response.json()
+                if not isinstance(data, list):
+                    continue
+                
+                for quote in data:
+                    quote_symbol = str(quote.get('symbol', '')).upper()
+                    quote_price = quote.get('price')
+                    if quote_symbol and quote_price is not None:
+                        prices[quote_symbol] = quote_price
+                        if self.cache is not None:
+                            self.cache.set(
+                                f'price:{quote_symbol}',
+                                quote_price,
+                                ttl=self.price_ttl,
+                                stale_ttl=self.price_stale_ttl
+                            )
+            except requests.exceptions.RequestException as e:
+                print(f"Batch quote error: {e}")
+        
+        return prices
+
+    def get_batch_dividend_yields(
+        self,
+        symbols: List[str],
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Dict:
         """
-        Get dividend yields for multiple symbols
+        Get dividend yields for multiple symbols concurrently
+        
+        Prices for the whole batch are fetched up front with get_quotes(), so each
+        symbol only needs its /dividends call.
         
         Args:
             symbols: List of stock ticker symbols
+            max_workers: Max lookups in flight (defaults to self.max_workers)
+            timeout: Seconds to wait for the batch (defaults to self.batch_timeout).
+                Symbols still pending at the deadline are reported as timed out.
             
         Returns:
             Dict with results for each symbol
         """
-        results = {}
+        unique_symbols = self._normalize_symbols(symbols)
+        completed = {}
+        timed_out = []
         
-        for symbol in symbols:
-            symbol = symbol.strip().upper()
-            if symbol:
-                results[symbol] = self.get_dividend_yield(symbol)
+        for symbol, result, expired in self._iter_batch(unique_symbols, max_workers, timeout):
+            completed[symbol] = result
+            if expired:
+                timed_out.append(symbol)
         
-        return {
+        # Report results in the caller's order rather than completion order
+        results = {symbol: completed[symbol] for symbol in unique_symbols}
+        
+        response = {
             'results': results,
             'count': len(results),
             'timestamp': datetime.utcnow().isoformat() + 'Z'
         }
+        if timed_out:
+            response['partial'] = True
+            response['timedOut'] = timed_out
+        return response
+    
+    def iter_dividend_yields(
+        self,
+        symbols: List[str],
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Iterator[Tuple[str, Dict]]:
+        """
+        Yield (symbol, result) pairs for a batch as each lookup completes
+        
+        Same fan-out, bulk pricing and deadline as get_batch_dividend_yields, but
+        callers can forward each result as soon as it is ready.
+        
+        Args:
+            symbols: List of stock ticker symbols
+            max_workers: Max lookups in flight (defaults to self.max_workers)
+            timeout: Seconds to wait for the batch (defaults to self.batch_timeout)
+        """
+        for symbol, result, _ in self._iter_batch(self._normalize_symbols(symbols), max_workers, timeout):
+            yield symbol, result
+    
+    @staticmethod
+    def _normalize_symbols(symbols: List[str]) -> List[str]:
+        # Normalize and de-duplicate while keeping the caller's order
+        unique_symbols = []
+        for symbol in symbols:
+            symbol = str(symbol).strip().upper()
+            if symbol and symbol not in unique_symbols:
+                unique_symbols.append(symbol)
+        return unique_symbols
+    
+    def _iter_batch(
+        self,
+        unique_symbols: List[str],
+        max_workers: Optional[int],
+        timeout: Optional[float]
+    ) -> Iterator[Tuple[str, Dict, bool]]:
+        """Run the batch fan-out, yielding (symbol, result, timed_out) in completion order"""
+        if not unique_symbols:
+            return
+        
+        workers = min(max_workers or self.max_workers, len(unique_symbols))
+        deadline = self.batch_timeout if timeout is None else timeout
+        started = time.monotonic()
+        
+        prices = self.get_quotes(unique_symbols)
+        
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fmp-batch')
+        futures = {
+            executor.submit(self.get_dividend_yield, symbol, prices.get(symbol)): symbol
+            for symbol in unique_symbols
+        }
+        pending = set(futures)
+        try:
+            remaining = max(0.0, deadline - (time.monotonic() - started))
+            for future in as_completed(futures, timeout=remaining):
+                pending.discard(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {
+                        'error': 'Unexpected error',
+                        'message': str(e)
+                    }
+                yield futures[future], result, False
+        except FuturesTimeoutError:
+            pass
+        finally:
+            # Don't block the request on stragglers; queued lookups are dropped.
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        for future in pending:
+            symbol = futures[future]
+            yield symbol, {
+                'error': 'Request timeout',
+                'message': f'Lookup for {symbol} did not finish within {deadline}s'
+            }, True
     
     def search_symbol(self, query: str) -> List[Dict]:
         """
@@ -179,14 +564,14 @@ class FMPService:
             List of matching symbols with descriptions
         """
         try:
-            search_url = f"{self.BASE_URL}/search"
+            search_url = f"{self.base_url}/search"
             params = {
                 'query': query,
                 'apikey': self.api_key,
                 'limit': 10
             }
             
-            response = self.session.get(search_url, params=params, timeout=10)
+            response = self._get(search_url, params)
             
             if response.status_code != 200:
                 return []
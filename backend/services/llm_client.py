@@ -0,0 +1,74 @@
+import os
+import threading
+from typing import Optional
+
+import httpx
+from openai import OpenAI
+
+
+class OpenAIClientPool:
+    """
+    Process-wide OpenAI client with a tuned, reused connection pool
+
+    The client (and its httpx pool) is created lazily on first use and shared
+    by every request in the worker, so chat calls reuse warm TLS connections.
+    Pointing base_url at an OpenAI-compatible stand-in (see
+    tools/fake_openai_server.py) lets /api/chat be load-tested offline.
+    """
+
+    # Key sent to a stand-in server when no real key is configured
+    STAND_IN_API_KEY = 'local-stand-in'
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: Optional[str] = None,
+        timeout: float = 60.0,
+        connect_timeout: float = 5.0,
+        max_retries: int = 2,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10
+    ):
+        """
+        Args:
+            api_key: OpenAI API key (optional when base_url points at a stand-in)
+            base_url: OpenAI-compatible endpoint, e.g. http://127.0.0.1:8089/v1
+            timeout: Overall request timeout in seconds
+            connect_timeout: TCP/TLS connect timeout in seconds
+            max_retries: SDK retries on connection errors, 429 and 5xx
+            max_connections: Upper bound on open connections
+            max_keepalive_connections: Idle connections kept warm
+        """
+        self.api_key = api_key or (self.STAND_IN_API_KEY if base_url else None)
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self._client: Optional[OpenAI] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    @property
+    def stand_in(self) -> bool:
+        return self.api_key == self.STAND_IN_API_KEY
+
+    def get(self) -> OpenAI:
+        """The shared client, created on first use (and again after a fork)"""
+        with self._lock:
+            if self._client is None or self._pid != os.getpid():
+                self._client = OpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    max_retries=self.max_retries,
+                    timeout=self.timeout,
+                    http_client=httpx.Client(limits=self.limits, timeout=self.timeout)
+                )
+                self._pid = os.getpid()
+            return self._client
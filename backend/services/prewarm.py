@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+
+class SymbolPopularity:
+    """Decaying request counts per symbol, so yesterday's favourites fade out"""
+
+    def __init__(self, half_life: float = 6 * 60 * 60, max_symbols: int = 2000):
+        """
+        Args:
+            half_life: Seconds after which a request counts half as much
+            max_symbols: Symbols tracked before the least popular are dropped
+        """
+        self.half_life = half_life
+        self.max_symbols = max_symbols
+        self._scores: Dict[str, float] = defaultdict(float)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, symbols: Iterable[str]) -> None:
+        with self._lock:
+            self._decay()
+            for symbol in symbols:
+                symbol = str(symbol).strip().upper()
+                if symbol:
+                    self._scores[symbol] += 1.0
+            if len(self._scores) > self.max_symbols:
+                keep = sorted(self._scores.items(), key=lambda item: item[1], reverse=True)[:self.max_symbols]
+                self._scores = defaultdict(float, keep)
+
+    def top(self, n: int) -> List[str]:
+        """The n most requested symbols, most popular first"""
+        with self._lock:
+            self._decay()
+            ranked = sorted(self._scores.items(), key=lambda item: item[1], reverse=True)
+        return [symbol for symbol, _ in ranked[:n]]
+
+    def _decay(self) -> None:
+        now = time.monotonic()
+        factor = 0.5 ** ((now - self._updated) / self.half_life)
+        self._updated = now
+        if factor < 1.0:
+            for symbol in self._scores:
+                self._scores[symbol] *= factor
+
+
+class Prewarmer:
+    """
+    Background thread that refreshes popular symbols before their cache entries expire
+
+    Every interval seconds it takes the top_n symbols, finds the ones whose
+    cached price or dividend series expires within lead_time, and refreshes
+    them: prices with one bulk quote request, dividend series one symbol at a
+    time. Each cycle spends at most quota_share of the calls_per_minute budget.
+    """
+
+    def __init__(
+        self,
+        service,
+        popularity: SymbolPopularity,
+        calls_per_minute: float,
+        top_n: int = 25,
+        interval: float = 60.0,
+        quota_share: float = 0.2
+    ):
+        """
+        Args:
+            service: FMPService with a cache configured
+            popularity: Shared request-frequency tracker
+            calls_per_minute: Provider quota for this process
+            top_n: How many of the most requested symbols to keep warm
+            interval: Seconds between refresh cycles
+            quota_share: Fraction of the quota the prewarmer may use
+        """
+        self.service = service
+        self.popularity = popularity
+        self.calls_per_minute = calls_per_minute
+        self.top_n = top_n
+        self.interval = interval
+        self.quota_share = quota_share
+        # Refresh anything expiring before the cycle after next could reach it
+        self.lead_time = 2 * interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counters = {
+            'cycles': 0,
+            'pricesRefreshed': 0,
+            'dividendsRefreshed': 0,
+            'skippedForBudget': 0,
+            'errors': 0,
+        }
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='prewarm', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_once(self) -> None:
+        """One refresh cycle (called by the background thread; handy for scripts)"""
+        cache = self.service.cache
+        budget = int(self.calls_per_minute * self.quota_share * self.interval / 60.0)
+        symbols = self.popularity.top(self.top_n)
+
+        stale_prices = [s for s in symbols if self._expiring(cache, f'price:{s}')]
+        stale_dividends = [s for s in symbols if self._expiring(cache, f'dividends:{s}')]
+
+        if stale_prices and budget > 0:
+            prices = self.service.get_quotes(stale_prices, use_cached=False)
+            budget -= -(-len(stale_prices) // self.service.QUOTE_CHUNK_SIZE)
+            self._count('pricesRefreshed', len(prices))
+
+        for index, symbol in enumerate(stale_dividends):
+            if budget <= 0:
+                self._count('skippedForBudget', len(stale_dividends) - index)
+                break
+            try:
+                if not self.service.refresh_dividends(symbol):
+                    # Joined a lookup already in flight: no call of ours to charge
+                    continue
+                self._count('dividendsRefreshed')
+            except Exception as e:
+                print(f"Prewarm error for {symbol}: {e}")
+                self._count('errors')
+            budget -= 1
+
+        self._count('cycles')
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._counters,
+                'topSymbols': self.popularity.top(10),
+            }
+
+    def _expiring(self, cache, key: str) -> bool:
+        remaining = cache.expires_in(key)
+        return remaining is None or remaining < self.lead_time
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Prewarm cycle error: {e}")
+                self._count('errors')
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
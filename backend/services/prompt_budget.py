@@ -0,0 +1,189 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# Rough chars-per-token for English when tiktoken isn't installed
+CHARS_PER_TOKEN = 4
+# Per-message framing tokens in the chat format (role, separators)
+MESSAGE_OVERHEAD = 4
+# Tokens the API adds to prime the assistant reply
+REPLY_PRIMING = 3
+
+# Items kept per userContext list and the longest string kept per field
+USER_CONTEXT_LIMITS = {
+    'expenseBreakdown': 8,
+    'portfolio': 5,
+    'properties': 3,
+    'variables': 20,
+}
+MAX_CONTEXT_STRING = 200
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and TIKTOKEN_AVAILABLE:
+        try:
+            _encoding = tiktoken.get_encoding('o200k_base')
+        except Exception as e:
+            # The encoding file is downloaded on first use; offline hosts fall back
+            print(f"tiktoken unavailable ({e}); estimating prompt tokens")
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """Token count for text (exact with tiktoken, estimated otherwise)"""
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens, marking the cut with an ellipsis"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding:
+        return encoding.decode(encoding.encode(text)[:max(0, max_tokens - 1)]) + '…'
+    return text[:max(0, max_tokens - 1) * CHARS_PER_TOKEN] + '…'
+
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return MESSAGE_OVERHEAD + count_tokens(message['content'])
+
+
+def cap_user_context(user_context: Any) -> Dict[str, Any]:
+    """
+    Copy of userContext with list fields and long strings trimmed
+
+    The browser sends whatever it has; this bounds how much of it can end up
+    in the system prompt (see USER_CONTEXT_LIMITS and MAX_CONTEXT_STRING).
+    """
+    if not isinstance(user_context, dict):
+        return {}
+
+    def cap(value):
+        if isinstance(value, str):
+            return value[:MAX_CONTEXT_STRING]
+        if isinstance(value, dict):
+            return {str(k)[:MAX_CONTEXT_STRING]: cap(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [cap(v) for v in value]
+        return value
+
+    capped = {}
+    for key, value in user_context.items():
+        limit = USER_CONTEXT_LIMITS.get(key)
+        if limit is not None and isinstance(value, list):
+            value = value[:limit]
+        elif limit is not None and isinstance(value, dict):
+            value = dict(list(value.items())[:limit])
+        capped[key] = cap(value)
+    return capped
+
+
+class PromptAssembler:
+    """
+    Builds the chat messages list within a token budget
+
+    The system prompt and the new message are always sent. History is added
+    newest first until the budget runs out; older turns that don't fit are
+    replaced by a one-line summary of what the user asked earlier (or dropped
+    if even that doesn't fit). Any single history message is cut to
+    max_message_tokens so one pasted wall of text can't crowd out the rest.
+    """
+
+    def __init__(self, budget: int = 3000, max_message_tokens: int = 500, summary_tokens: int = 150):
+        """
+        Args:
+            budget: Max prompt tokens (system prompt + history + message)
+            max_message_tokens: Longest single history message kept
+            summary_tokens: Max tokens for the summary of dropped turns
+        """
+        self.budget = budget
+        self.max_message_tokens = max_message_tokens
+        self.summary_tokens = summary_tokens
+
+    def assemble(
+        self,
+        system_prompt: str,
+        history: List[Any],
+        message: str
+    ) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """
+        Args:
+            system_prompt: System prompt (always kept)
+            history: Client-supplied [{role, content}] turns, oldest first
+            message: The new user message (always kept)
+
+        Returns:
+            (messages for the chat completions API, report with promptTokens,
+            historyTurns, keptTurns, droppedTurns, summarized and tokenizer)
+        """
+        system = {'role': 'system', 'content': system_prompt}
+        user = {'role': 'user', 'content': message}
+        used = message_tokens(system) + message_tokens(user) + REPLY_PRIMING
+
+        turns = []
+        for msg in history if isinstance(history, list) else []:
+            if isinstance(msg, dict) and 'role' in msg and 'content' in msg:
+                # Only 'user' and 'assistant' turns may come from the client
+                role = 'user' if msg['role'] == 'user' else 'assistant'
+                turns.append({'role': role, 'content': str(msg['content'])})
+
+        kept: List[Dict[str, str]] = []
+        costs: List[int] = []
+        for msg in reversed(turns):
+            msg = {'role': msg['role'], 'content': truncate_tokens(msg['content'], self.max_message_tokens)}
+            cost = message_tokens(msg)
+            if used + cost > self.budget:
+                break
+            kept.append(msg)
+            costs.append(cost)
+            used += cost
+
+        summary = None
+        older = turns[:len(turns) - len(kept)]
+        if older:
+            # Make room for the summary by giving up the oldest kept turns
+            summary = self._summarize(older)
+            summary_cost = message_tokens(summary)
+            while kept and used + summary_cost > self.budget:
+                kept.pop()
+                used -= costs.pop()
+            if used + summary_cost <= self.budget:
+                used += summary_cost
+            else:
+                summary = None
+
+        kept.reverse()
+        messages = [system] + ([summary] if summary else []) + kept + [user]
+        return messages, {
+            'promptTokens': used,
+            'historyTurns': len(turns),
+            'keptTurns': len(kept),
+            'droppedTurns': len(turns) - len(kept),
+            'summarized': summary is not None,
+            'tokenizer': 'tiktoken' if _get_encoding() else 'estimate',
+        }
+
+    def _summarize(self, turns: List[Dict[str, str]]) -> Dict[str, str]:
+        # Extractive, not a model call: the user's earlier questions, first sentence each
+        questions = []
+        for msg in turns:
+            if msg['role'] != 'user':
+                continue
+            first = re.split(r'(?<=[.?!])\s', msg['content'].strip(), maxsplit=1)[0]
+            questions.append(' '.join(first.split()[:20]))
+        # The most recent dropped questions are the likeliest to be referred back to
+        text = 'Earlier in this conversation the user asked: ' + '; '.join(questions[-8:]) \
+            if questions else 'Earlier turns of this conversation were omitted.'
+        return {'role': 'system', 'content': truncate_tokens(text, self.summary_tokens)}
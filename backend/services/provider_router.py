@@ -0,0 +1,403 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Errors that mean the provider itself is unhealthy (as opposed to a bad ticker),
+# so the router fails over and the circuit breaker counts a failure.
+PROVIDER_ERRORS = {
+    'Rate limit exceeded',
+    'Request timeout',
+    'API request failed',
+    'API error',
+    'Invalid API key',
+    'Unexpected error',
+}
+
+
+def is_provider_failure(result: Dict) -> bool:
+    return isinstance(result, dict) and result.get('error') in PROVIDER_ERRORS
+
+
+def is_shed(result: Dict) -> bool:
+    """Our own rate governor refused the call; the provider was never asked"""
+    return isinstance(result, dict) and result.get('shed') is True
+
+
+class LatencyTracker:
+    """Rolling window of call latencies for percentile estimates"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker for one provider
+
+    Opens after failure_threshold consecutive failures, where a call slower than
+    latency_threshold also counts as a failure. After reset_timeout one trial
+    call is let through (half-open); its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        latency_threshold: Optional[float] = None
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latency_threshold = latency_threshold
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may be sent to the provider right now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            # A trial that never reported back (e.g. the router didn't end up
+            # calling this provider) must not wedge the breaker half-open
+            if self.state == self.HALF_OPEN and (
+                not self._trial_in_flight or now - self._trial_started >= self.reset_timeout
+            ):
+                self._trial_in_flight = True
+                self._trial_started = now
+                return True
+            return False
+
+    def record(self, success: bool, latency: float) -> None:
+        if success and self.latency_threshold is not None and latency > self.latency_threshold:
+            success = False
+        with self._lock:
+            if success:
+                self.state = self.CLOSED
+                self._failures = 0
+                self._trial_in_flight = False
+                return
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class ProviderRouter:
+    """
+    Market data facade over several providers with failover and hedging
+
+    Exposes the same get_dividend_yield / get_batch_dividend_yields /
+    search_symbol interface as FMPService and FinnhubService. Providers are
+    tried in order, skipping any whose circuit breaker is open. With hedging
+    on, a single-symbol lookup also fires the next provider once the first has
+    been outstanding longer than its recent p95 latency, and the first healthy
+    answer wins.
+    """
+
+    # Latency samples needed before the observed p95 replaces hedge_delay
+    MIN_HEDGE_SAMPLES = 20
+
+    def __init__(
+        self,
+        providers: List[Tuple[str, Any]],
+        hedge: bool = False,
+        hedge_delay: float = 1.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        latency_threshold: Optional[float] = None,
+        max_workers: int = 16,
+        batch_timeout: float = 20.0
+    ):
+        """
+        Args:
+            providers: (name, service) pairs in priority order
+            hedge: Fire the fallback provider when the primary is slow
+            hedge_delay: Hedge delay in seconds until enough latency samples exist
+            failure_threshold: Consecutive failures that open a provider's breaker
+            reset_timeout: Seconds an open breaker waits before a trial call
+            latency_threshold: Calls slower than this count as breaker failures
+            max_workers: Threads available for hedged calls
+            batch_timeout: Seconds a batch may take across every provider, failover included
+        """
+        if not providers:
+            raise ValueError('ProviderRouter needs at least one provider')
+        self.providers = providers
+        self.hedge = hedge and len(providers) > 1
+        self.hedge_delay = hedge_delay
+        self.batch_timeout = batch_timeout
+        self.breakers = {
+            name: CircuitBreaker(failure_threshold, reset_timeout, latency_threshold)
+            for name, _ in providers
+        }
+        self.latency = {name: LatencyTracker() for name, _ in providers}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='provider-hedge')
+        self._lock = threading.Lock()
+        self._counters = {
+            'failovers': 0,
+            'hedges': 0,
+            'hedgeWins': 0,
+            'lastResort': 0,
+        }
+
+    def get_dividend_yield(self, symbol: str) -> Dict:
+        """
+        Get dividend yield for a stock symbol from the first healthy provider
+
+        Args:
+            symbol: Stock ticker symbol (e.g., 'AAPL')
+
+        Returns:
+            Dict with symbol, dividendYield, and metadata (or the last error)
+        """
+        candidates = self._available()
+        if self.hedge and len(candidates) > 1:
+            return self._hedged_lookup(symbol, candidates)
+
+        result = None
+        for index, (name, service) in enumerate(candidates):
+            if index > 0:
+                self._count('failovers')
+            result = self._call(name, service, symbol)
+            if not is_provider_failure(result):
+                return result
+        return result
+
+    def get_batch_dividend_yields(self, symbols: List[str]) -> Dict:
+        """
+        Get dividend yields for multiple symbols
+
+        The first healthy provider answers the whole batch; symbols it failed on
+        are retried on the remaining providers. All passes share one batch_timeout
+        budget: each provider gets only what is left, and once it is spent the
+        remaining failures are returned as they are.
+
+        Args:
+            symbols: List of stock ticker symbols
+
+        Returns:
+            Dict with results for each symbol
+        """
+        candidates = self._available()
+        results: Dict[str, Dict] = {}
+        pending = [s.strip().upper() for s in symbols if str(s).strip()]
+        timed_out = set()
+        started_batch = time.monotonic()
+
+        for index, (name, service) in enumerate(candidates):
+            if not pending:
+                break
+            remaining = self.batch_timeout - (time.monotonic() - started_batch)
+            if remaining <= 0:
+                break
+            if index > 0:
+                self._count('failovers')
+            started = time.monotonic()
+            batch = service.get_batch_dividend_yields(pending, timeout=remaining)
+            elapsed = time.monotonic() - started
+            provider_results = batch.get('results', {})
+            results.update(provider_results)
+            timed_out.update(batch.get('timedOut', []))
+            pending = [s for s in pending if is_provider_failure(provider_results.get(s, {'error': 'API error'}))]
+            # Judge provider health by the batch as a whole, not per symbol, leaving
+            # out lookups our own governor shed before they reached the provider
+            shed = sum(1 for s in pending if is_shed(provider_results.get(s)))
+            judged = len(provider_results) - shed
+            if judged > 0:
+                self._record(name, len(pending) - shed < judged, elapsed / judged)
+
+        for symbol in pending:
+            results.setdefault(symbol, {
+                'error': 'API request failed',
+                'message': 'All market data providers are temporarily unavailable'
+            })
+
+        response = {
+            'results': results,
+            'count': len(results),
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }
+        # A symbol is only timed out if no provider answered it within the budget
+        still_timed_out = [s for s in pending if s in timed_out]
+        if still_timed_out:
+            response['partial'] = True
+            response['timedOut'] = still_timed_out
+        return response
+
+    def iter_dividend_yields(self, symbols: List[str]) -> Iterator[Tuple[str, Dict]]:
+        """
+        Yield (symbol, result) pairs as each lookup completes
+
+        The first healthy provider streams the batch; a symbol it fails on is
+        retried on the remaining providers before being yielded.
+
+        Args:
+            symbols: List of stock ticker symbols
+        """
+        pending = []
+        for symbol in symbols:
+            symbol = str(symbol).strip().upper()
+            if symbol and symbol not in pending:
+                pending.append(symbol)
+
+        candidates = self._available()
+        name, service = candidates[0]
+        if hasattr(service, 'iter_dividend_yields'):
+            stream = service.iter_dividend_yields(pending)
+        else:
+            stream = ((symbol, self._call(name, service, symbol)) for symbol in pending)
+
+        started = time.monotonic()
+        total = failed = 0
+        for symbol, result in stream:
+            if not is_shed(result):
+                total += 1
+                failed += is_provider_failure(result)
+            if is_provider_failure(result):
+                for fallback_name, fallback in candidates[1:]:
+                    # Same budget as get_batch_dividend_yields: no failover once it is spent
+                    if time.monotonic() - started >= self.batch_timeout:
+                        break
+                    self._count('failovers')
+                    result = self._call(fallback_name, fallback, symbol)
+                    if not is_provider_failure(result):
+                        break
+            yield symbol, result
+
+        # Judge the primary by the batch as a whole, as get_batch_dividend_yields does
+        if total:
+            self._record(name, failed < total, (time.monotonic() - started) / total)
+
+    def search_symbol(self, query: str) -> List[Dict]:
+        """
+        Search for stock symbols, falling through providers that return nothing
+
+        Args:
+            query: Company name or partial ticker
+
+        Returns:
+            List of matching symbols with descriptions
+        """
+        for name, service in self._available():
+            started = time.monotonic()
+            results = service.search_symbol(query)
+            self._record(name, True, time.monotonic() - started)
+            if results:
+                return results
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker states, latency percentiles and failover counters"""
+        providers = {}
+        for name, _ in self.providers:
+            p50 = self.latency[name].percentile(50)
+            p95 = self.latency[name].percentile(95)
+            providers[name] = {
+                'state': self.breakers[name].state,
+                'p50Ms': round(p50 * 1000) if p50 is not None else None,
+                'p95Ms': round(p95 * 1000) if p95 is not None else None,
+            }
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            'order': [name for name, _ in self.providers],
+            'hedging': self.hedge,
+            'providers': providers,
+            **counters,
+        }
+
+    def _available(self) -> List[Tuple[str, Any]]:
+        available = [(name, service) for name, service in self.providers if self.breakers[name].allow()]
+        if available:
+            return available
+        # Every breaker is open. Still ask the primary: its cache and stale copies
+        # answer many lookups, and a lone provider mustn't turn into a full outage.
+        self._count('lastResort')
+        return [self.providers[0]]
+
+    def _record(self, name: str, success: bool, latency: float) -> None:
+        breaker = self.breakers[name]
+        # A call made as last resort past an open breaker doesn't reset its timer
+        if breaker.state != CircuitBreaker.OPEN:
+            breaker.record(success, latency)
+
+    def _call(self, name: str, service: Any, symbol: str) -> Dict:
+        started = time.monotonic()
+        try:
+            result = service.get_dividend_yield(symbol)
+        except Exception as e:
+            result = {'error': 'Unexpected error', 'message': str(e)}
+        elapsed = time.monotonic() - started
+        self.latency[name].record(elapsed)
+        if not is_shed(result):
+            self._record(name, not is_provider_failure(result), elapsed)
+        return result
+
+    def _hedged_lookup(self, symbol: str, candidates: List[Tuple[str, Any]]) -> Dict:
+        primary_name, primary = candidates[0]
+        futures = {self._executor.submit(self._call, primary_name, primary, symbol): primary_name}
+        done, _ = wait(futures, timeout=self._hedge_delay(primary_name))
+
+        if done:
+            result = next(iter(done)).result()
+            if not is_provider_failure(result):
+                return result
+            self._count('failovers')
+        else:
+            self._count('hedges')
+
+        # Primary is slow (or failed): race the remaining providers against it
+        for name, service in candidates[1:]:
+            futures[self._executor.submit(self._call, name, service, symbol)] = name
+
+        result = None
+        pending = set(futures) - done
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                if not is_provider_failure(result):
+                    if futures[future] != primary_name:
+                        self._count('hedgeWins')
+                    return result
+        return result
+
+    def _hedge_delay(self, name: str) -> float:
+        if len(self.latency[name]) < self.MIN_HEDGE_SAMPLES:
+            return self.hedge_delay
+        return self.latency[name].percentile(95) or self.hedge_delay
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
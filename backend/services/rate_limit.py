@@ -0,0 +1,164 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+import requests
+
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    """The governor shed a request because no token freed up within its queue wait"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a fixed calls-per-minute rate"""
+
+    def __init__(self, calls_per_minute: float, burst: Optional[int] = None):
+        """
+        Args:
+            calls_per_minute: Sustained rate (the plan's quota)
+            burst: Bucket capacity; defaults to one second's worth of calls (min 1)
+        """
+        self.rate = calls_per_minute / 60.0
+        self.capacity = float(burst if burst is not None else max(1, int(self.rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        """
+        Take one token, waiting up to timeout seconds for one to become available
+
+        Returns:
+            True if a token was taken, False if the request should be shed
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Stop granting tokens for seconds (used when the provider says Retry-After)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateGovernor:
+    """
+    Client-side quota enforcement shared by every caller of one provider
+
+    Requests wait for a token before leaving the process and are shed with
+    RateLimitExceeded if none frees up within max_queue_wait. A 429 response
+    pauses the whole bucket (honoring Retry-After) and the request is retried
+    with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: float,
+        burst: Optional[int] = None,
+        max_queue_wait: float = 5.0,
+        max_retries: int = 3,
+        base_backoff: float = 0.5,
+        max_backoff: float = 20.0
+    ):
+        """
+        Args:
+            calls_per_minute: Quota for this process
+            burst: Token bucket capacity
+            max_queue_wait: Seconds a request may wait for a token before being shed
+            max_retries: Retries after a 429 response
+            base_backoff: First backoff step in seconds (doubles per retry)
+            max_backoff: Cap on a single backoff sleep, including Retry-After
+        """
+        self.bucket = TokenBucket(calls_per_minute, burst)
+        self.max_queue_wait = max_queue_wait
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._counters = {
+            'requests': 0,
+            'shed': 0,
+            'throttled': 0,
+            'retries': 0,
+        }
+
+    def request(self, send: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Send a request under the quota
+
+        Args:
+            send: Zero-argument callable performing the HTTP call
+
+        Returns:
+            The final response (still a 429 if every retry was throttled)
+
+        Raises:
+            RateLimitExceeded: No token became available within max_queue_wait
+        """
+        attempt = 0
+        delay = 0.0
+        while True:
+            # A retry may first have to sit out the Retry-After pause
+            if not self.bucket.acquire(self.max_queue_wait + delay):
+                self._count('shed')
+                raise RateLimitExceeded('Local rate limit reached; request shed')
+            self._count('requests')
+
+            response = send()
+            if response.status_code != 429:
+                return response
+
+            self._count('throttled')
+            if attempt >= self.max_retries:
+                return response
+
+            delay = self._retry_after(response)
+            if delay is None:
+                # Full jitter: spreads retries from concurrent callers apart
+                delay = random.uniform(0, self.base_backoff * (2 ** attempt))
+            delay = min(delay, self.max_backoff)
+            self.bucket.pause(delay)
+            self._count('retries')
+            attempt += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                **self._counters,
+                'callsPerMinute': round(self.bucket.rate * 60, 2),
+            }
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,79 @@
+import threading
+from typing import Any, Callable, Dict
+
+
+class _Call:
+    """One in-flight invocation and the result shared with its waiters"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution
+
+    The first caller for a key runs fn; callers arriving while it is still
+    running block and receive the same result (or exception). Once the call
+    finishes the key is forgotten, so later calls run fn again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._counters = {
+            'calls': 0,
+            'executions': 0,
+            'coalesced': 0,
+        }
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn for key, or wait for the identical call already in flight
+
+        Args:
+            key: Identity of the call (e.g. 'dividends:SCHD')
+            fn: Zero-argument callable doing the actual work
+
+        Returns:
+            fn's result; if fn raised, the exception is re-raised for every caller
+        """
+        with self._lock:
+            self._counters['calls'] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._counters['coalesced'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._counters['executions'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for the health endpoint"""
+        with self._lock:
+            return {
+                **self._counters,
+                'inFlight': len(self._calls),
+            }
@@ -0,0 +1,484 @@
+import ast
+import csv
+import io
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+try:
+    import fcntl
+except ImportError:
+    # Windows dev machines: no cross-process file locking, single worker assumed
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: str, blocking: bool = True):
+    """
+    Exclusive advisory lock shared by every process on the host
+
+    Yields True when the lock is held, False when blocking=False and another
+    process has it.
+    """
+    with open(path, 'a') as handle:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class WaitlistQueue:
+    """
+    Durable signup queue in SQLite (WAL), shared by all workers on the host
+
+    Each signup is one row that two consumers work through independently:
+    'stored' flips once it is written to permanent storage, 'dispatched' once
+    the webhook accepted it (or -1 after giving up). A row is deleted as soon
+    as both are done, so the queue only holds signups still in flight (and
+    parked ones, for inspection).
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite file (created if missing)
+        """
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS signups ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' created_at TEXT NOT NULL,'
+                ' email TEXT NOT NULL,'
+                ' meta TEXT NOT NULL,'
+                ' stored INTEGER NOT NULL DEFAULT 0,'
+                ' dispatched INTEGER NOT NULL DEFAULT 0,'
+                ' attempts INTEGER NOT NULL DEFAULT 0,'
+                ' next_attempt_at REAL NOT NULL DEFAULT 0)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS signups_stored ON signups (stored, id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS signups_dispatch ON signups (dispatched, next_attempt_at)')
+
+    def enqueue(self, email: str, meta: Dict, dispatch: bool = True) -> int:
+        """
+        Record a signup (one small INSERT); returns its queue id
+
+        Args:
+            email: Address as submitted
+            meta: Signup context from the frontend
+            dispatch: False when no webhook is configured, so nothing waits to be sent
+        """
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(
+                'INSERT INTO signups (created_at, email, meta, dispatched) VALUES (?, ?, ?, ?)',
+                (datetime.utcnow().isoformat(), email, json.dumps(meta), 0 if dispatch else 1)
+            )
+        return cursor.lastrowid
+
+    def unstored(self, limit: int) -> List[Dict]:
+        rows = self._conn().execute(
+            'SELECT id, created_at, email, meta FROM signups WHERE stored = 0 ORDER BY id LIMIT ?',
+            (limit,)
+        ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def mark_stored(self, ids: List[int]) -> None:
+        self._finish('UPDATE signups SET stored = 1 WHERE id = ?', ids)
+
+    def undispatched(self, limit: int) -> List[Dict]:
+        rows = self._conn().execute(
+            'SELECT id, created_at, email, meta, attempts FROM signups'
+            ' WHERE dispatched = 0 AND next_attempt_at <= ? ORDER BY id LIMIT ?',
+            (time.time(), limit)
+        ).fetchall()
+        return [{**self._row(row), 'attempts': row[4]} for row in rows]
+
+    def mark_dispatched(self, ids: List[int]) -> None:
+        self._finish('UPDATE signups SET dispatched = 1 WHERE id = ?', ids)
+
+    def retry_later(self, ids: List[int], next_attempt_at: float, give_up_after: int) -> None:
+        """Count a failed attempt; rows that reached give_up_after attempts are parked (dispatched = -1)"""
+        self._update(
+            'UPDATE signups SET attempts = attempts + 1, next_attempt_at = ?,'
+            ' dispatched = CASE WHEN attempts + 1 >= ? THEN -1 ELSE 0 END WHERE id = ?',
+            [(next_attempt_at, give_up_after, i) for i in ids]
+        )
+
+    def counts(self) -> Dict[str, int]:
+        row = self._conn().execute(
+            'SELECT'
+            ' COALESCE(SUM(stored = 0), 0),'
+            ' COALESCE(SUM(dispatched = 0), 0),'
+            ' COALESCE(SUM(dispatched = -1), 0)'
+            ' FROM signups'
+        ).fetchone()
+        return {'pendingStore': row[0], 'pendingDispatch': row[1], 'failedDispatch': row[2]}
+
+    def _finish(self, sql: str, ids: List[int]) -> None:
+        # Mark, then drop rows the other consumer is also done with, in one transaction
+        if not ids:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany(sql, [(i,) for i in ids])
+            conn.executemany(
+                'DELETE FROM signups WHERE id = ? AND stored = 1 AND dispatched = 1', [(i,) for i in ids]
+            )
+
+    def _update(self, sql: str, params: List[tuple]) -> None:
+        if not params:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany(sql, params)
+
+    @staticmethod
+    def _row(row) -> Dict:
+        return {'id': row[0], 'created_at': row[1], 'email': row[2], 'meta': json.loads(row[3])}
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads, so keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+
+class WaitlistStore:
+    """
+    Permanent waitlist storage in SQLite (WAL), one row per email
+
+    Emails are normalized to lowercase and carry a unique index, so dedupe is
+    an index probe: a repeat signup bumps signup_count and last_signup_at
+    instead of adding a row. source and builder_step are copied out of meta
+    into indexed columns for the aggregate counts.
+    """
+
+    EXPORT_COLUMNS = ['email', 'first_signup_at', 'last_signup_at', 'signup_count', 'source', 'builder_step', 'meta']
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite file (created if missing)
+        """
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS waitlist ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' email TEXT NOT NULL,'
+                ' first_signup_at TEXT NOT NULL,'
+                ' last_signup_at TEXT NOT NULL,'
+                ' signup_count INTEGER NOT NULL DEFAULT 1,'
+                ' source TEXT,'
+                ' builder_step TEXT,'
+                ' meta TEXT NOT NULL)'
+            )
+            conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS waitlist_email ON waitlist (email)')
+            conn.execute('CREATE INDEX IF NOT EXISTS waitlist_source ON waitlist (source)')
+            conn.execute('CREATE INDEX IF NOT EXISTS waitlist_builder_step ON waitlist (builder_step)')
+
+    def write_batch(self, signups: List[Dict]) -> int:
+        """Insert or merge signups in one transaction; returns how many emails were new"""
+        conn = self._conn()
+        with conn:
+            new = 0
+            for signup in signups:
+                email = normalize_email(signup['email'])
+                meta = signup['meta'] if isinstance(signup['meta'], dict) else {}
+                cursor = conn.execute(
+                    'INSERT INTO waitlist (email, first_signup_at, last_signup_at, source, builder_step, meta)'
+                    ' VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (email) DO NOTHING',
+                    (
+                        email, signup['created_at'], signup['created_at'],
+                        _text(meta.get('source')), _text(meta.get('builderStep')), json.dumps(meta)
+                    )
+                )
+                if cursor.rowcount:
+                    new += 1
+                    continue
+                # Already signed up: keep the first signup's attribution, record the repeat
+                conn.execute(
+                    'UPDATE waitlist SET signup_count = signup_count + 1,'
+                    ' last_signup_at = MAX(last_signup_at, ?) WHERE email = ?',
+                    (signup['created_at'], email)
+                )
+        return new
+
+    def contains(self, email: str) -> bool:
+        row = self._conn().execute(
+            'SELECT 1 FROM waitlist WHERE email = ?', (normalize_email(email),)
+        ).fetchone()
+        return row is not None
+
+    def counts(self) -> Dict:
+        """Signed-up emails in total and grouped by meta.source and meta.builderStep"""
+        conn = self._conn()
+        total, signups = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(signup_count), 0) FROM waitlist'
+        ).fetchone()
+        return {
+            'emails': total,
+            'signups': signups,
+            'bySource': dict(conn.execute(
+                "SELECT COALESCE(source, ''), COUNT(*) FROM waitlist GROUP BY source ORDER BY source"
+            ).fetchall()),
+            'byBuilderStep': dict(conn.execute(
+                "SELECT COALESCE(builder_step, ''), COUNT(*) FROM waitlist GROUP BY builder_step ORDER BY builder_step"
+            ).fetchall()),
+        }
+
+    def is_empty(self) -> bool:
+        return self._conn().execute('SELECT 1 FROM waitlist LIMIT 1').fetchone() is None
+
+    def iter_csv(self, chunk_rows: int = 500) -> Iterator[str]:
+        """
+        Yield the table as CSV text, a chunk of rows at a time
+
+        Uses its own connection and a read snapshot, so memory stays flat
+        however long the list is and concurrent signups don't disturb it.
+        """
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(self.EXPORT_COLUMNS)
+            cursor = conn.execute(f"SELECT {', '.join(self.EXPORT_COLUMNS)} FROM waitlist ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        finally:
+            conn.close()
+
+    def import_csv(self, path: str) -> int:
+        """
+        Load a legacy waitlist.csv (timestamp_iso, email, meta as a Python dict repr)
+
+        Returns how many emails were new.
+        """
+        signups = []
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                if not row.get('email'):
+                    continue
+                try:
+                    meta = ast.literal_eval(row.get('meta') or '{}')
+                except (ValueError, SyntaxError):
+                    meta = {}
+                signups.append({'created_at': row.get('timestamp_iso') or '', 'email': row['email'], 'meta': meta})
+        return self.write_batch(signups) if signups else 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def _text(value) -> Optional[str]:
+    return None if value is None or value == '' else str(value)
+
+
+class WaitlistPipeline:
+    """
+    Background consumers for the waitlist queue
+
+    The request handler only enqueues. A writer thread moves queued signups
+    into storage in batches, holding a host-wide file lock so two workers
+    never append at once. A dispatcher thread POSTs unsent signups to the
+    webhook as a JSON array (Zapier/Make run one step per element), retrying
+    failed batches with jittered exponential backoff. Delivery is
+    at-least-once: a crash between writing and marking can repeat a batch.
+    """
+
+    def __init__(
+        self,
+        queue: WaitlistQueue,
+        sink,
+        webhook_url: Optional[str] = None,
+        batch_size: int = 50,
+        interval: float = 2.0,
+        max_attempts: int = 8,
+        base_backoff: float = 5.0,
+        max_backoff: float = 600.0
+    ):
+        """
+        Args:
+            queue: Durable signup queue
+            sink: Storage with write_batch(signups)
+            webhook_url: Where signups are forwarded (None disables dispatching)
+            batch_size: Max signups per storage write and per webhook POST
+            interval: Seconds between passes when the queue is idle
+            max_attempts: Webhook attempts before a signup is parked
+            base_backoff: Seconds before the first webhook retry (doubles each time)
+            max_backoff: Upper bound on the retry delay
+        """
+        self.queue = queue
+        self.sink = sink
+        self.webhook_url = webhook_url
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.store_lock_path = queue.path + '.store.lock'
+        self.dispatch_lock_path = queue.path + '.dispatch.lock'
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._counters = {
+            'stored': 0,
+            'dispatched': 0,
+            'dispatchFailures': 0,
+            'errors': 0,
+        }
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._threads = [threading.Thread(target=self._run, args=(self.store_once, self._wake), name='waitlist-writer', daemon=True)]
+        if self.webhook_url:
+            self._threads.append(
+                threading.Thread(target=self._run, args=(self.dispatch_once, None), name='waitlist-dispatcher', daemon=True)
+            )
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def notify(self) -> None:
+        """Wake the writer so a new signup is stored without waiting a full interval"""
+        self._wake.set()
+
+    def store_once(self) -> int:
+        """Move one batch from the queue to storage; returns how many were stored"""
+        with file_lock(self.store_lock_path) as held:
+            if not held:
+                return 0
+            signups = self.queue.unstored(self.batch_size)
+            if not signups:
+                return 0
+            self.sink.write_batch(signups)
+            self.queue.mark_stored([s['id'] for s in signups])
+        self._count('stored', len(signups))
+        return len(signups)
+
+    def dispatch_once(self) -> int:
+        """POST one batch to the webhook; returns how many were delivered"""
+        # Only one worker dispatches at a time; the others skip this pass
+        with file_lock(self.dispatch_lock_path, blocking=False) as held:
+            if not held:
+                return 0
+            signups = self.queue.undispatched(self.batch_size)
+            if not signups:
+                return 0
+            payload = [
+                {
+                    'timestamp': s['created_at'],
+                    'email': s['email'],
+                    'source': s['meta'].get('source', '') if isinstance(s['meta'], dict) else '',
+                    'builderStep': s['meta'].get('builderStep', '') if isinstance(s['meta'], dict) else '',
+                }
+                for s in signups
+            ]
+            ids = [s['id'] for s in signups]
+            try:
+                with httpx.Client(timeout=10.0) as client:
+                    response = client.post(self.webhook_url, json=payload)
+                response.raise_for_status()
+            except Exception as e:
+                attempts = max(s['attempts'] for s in signups) + 1
+                delay = min(self.max_backoff, self.base_backoff * 2 ** (attempts - 1))
+                delay *= random.uniform(0.5, 1.0)
+                print(f"Waitlist webhook error (attempt {attempts}, retrying in {delay:.0f}s): {e}")
+                self.queue.retry_later(ids, time.time() + delay, self.max_attempts)
+                self._count('dispatchFailures')
+                return 0
+            self.queue.mark_dispatched(ids)
+        self._count('dispatched', len(ids))
+        return len(ids)
+
+    def flush(self) -> None:
+        """Store everything queued and make one dispatch pass (for scripts and shutdown)"""
+        while self.store_once():
+            pass
+        if self.webhook_url:
+            while self.dispatch_once():
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+        try:
+            counters.update(self.queue.counts())
+        except Exception as e:
+            counters['queueError'] = str(e)
+        return counters
+
+    def _run(self, step, wake: Optional[threading.Event]) -> None:
+        """
+        Args:
+            step: One pass (store_once or dispatch_once); returns how many rows it handled
+            wake: Event that cuts the idle wait short (None: only stop() does)
+        """
+        while not self._stop.is_set():
+            try:
+                # Keep going while there is a backlog, otherwise wait for the next tick
+                if step() >= self.batch_size:
+                    continue
+            except Exception as e:
+                print(f"Waitlist pipeline error: {e}")
+                self._count('errors')
+            if wake is None:
+                self._stop.wait(self.interval)
+                continue
+            # A notify() landing between the pass and here is kept, so it isn't lost
+            wake.wait(self.interval)
+            wake.clear()
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
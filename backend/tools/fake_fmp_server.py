@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Minimal Financial Modeling Prep stand-in for load-testing the market data routes offline.
+
+Serves the /stable endpoints the backend uses (/dividends, /quote, /batch-quote,
+/search) with deterministic fake data for any symbol and a configurable
+latency. No API key is checked.
+
+Usage:
+    python3 tools/fake_fmp_server.py [--port 8088] [--latency 0.2]
+
+Then start the backend against it:
+    FMP_API_KEY=stub FMP_BASE_URL=http://127.0.0.1:8088/stable python app.py
+"""
+import argparse
+import json
+import time
+import zlib
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def fake_price(symbol):
+    return round(20 + zlib.crc32(symbol.encode("utf-8")) % 400 + 0.37, 2)
+
+
+def fake_dividends(symbol, limit):
+    # Quarterly payments, newest first, sized for a 1-6% yield
+    amount = round(fake_price(symbol) * (1 + zlib.crc32(symbol.encode("utf-8")) % 6) / 400, 4)
+    newest = date.today().replace(day=1)
+    return [
+        {
+            "symbol": symbol,
+            "date": (newest - timedelta(days=91 * i)).isoformat(),
+            "dividend": amount,
+            "adjDividend": amount,
+        }
+        for i in range(limit)
+    ]
+
+
+def fake_quote(symbol):
+    return {"symbol": symbol, "name": f"{symbol} Inc.", "price": fake_price(symbol)}
+
+
+class FakeFMPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.2
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+        symbol = params.get("symbol", "").upper()
+
+        time.sleep(self.latency)
+        if endpoint == "dividends" and symbol:
+            self._json(fake_dividends(symbol, int(params.get("limit", 12))))
+        elif endpoint == "quote" and symbol:
+            self._json([fake_quote(symbol)])
+        elif endpoint == "batch-quote":
+            symbols = [s.strip().upper() for s in params.get("symbols", "").split(",") if s.strip()]
+            self._json([fake_quote(s) for s in symbols])
+        elif endpoint == "search":
+            query = params.get("query", "").upper()
+            self._json([{"symbol": query, "name": f"{query} Inc.", "exchangeShortName": "NYSE", "type": "stock"}])
+        else:
+            self._json({"error": "Not found"}, status=404)
+
+    def _json(self, payload, status=200):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Financial Modeling Prep stand-in server.")
+    ap.add_argument("--port", type=int, default=8088)
+    ap.add_argument("--latency", type=float, default=0.2, help="Seconds added to every response")
+    a = ap.parse_args()
+
+    FakeFMPHandler.latency = a.latency
+
+    server = ThreadingHTTPServer(("127.0.0.1", a.port), FakeFMPHandler)
+    print(f"Fake FMP server on http://127.0.0.1:{a.port}/stable (latency={a.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
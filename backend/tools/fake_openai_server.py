@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Minimal OpenAI-compatible stand-in for load-testing /api/chat offline.
+
+Serves POST /v1/chat/completions (plain JSON, or SSE chunks when the request
+sets "stream": true) with a canned reply and configurable latency. No API key
+is checked.
+
+Usage:
+    python3 tools/fake_openai_server.py [--port 8089] [--ttft 0.3] [--token-delay 0.02] [--tokens 60]
+
+Then start the backend against it:
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 python app.py
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "At your current savings rate you are on track to reach financial "
+    "independence in about **eleven years**. Raising your savings rate by five "
+    "points would pull that in by roughly two years."
+).split(" ")
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    ttft = 0.3
+    token_delay = 0.02
+    tokens = 60
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404, "Not found")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        model = body.get("model", "fake-model")
+        words = [WORDS[i % len(WORDS)] for i in range(self.tokens)]
+
+        time.sleep(self.ttft)
+        if body.get("stream"):
+            self._stream(model, words)
+        else:
+            time.sleep(self.token_delay * len(words))
+            self._json(model, " ".join(words))
+
+    def _json(self, model, text):
+        payload = json.dumps({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(text.split()), "total_tokens": 0},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, model, words):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for index, word in enumerate(words):
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "delta": {"content": word if index == 0 else " " + word},
+                        "finish_reason": None,
+                    }],
+                }
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+                time.sleep(self.token_delay)
+            self._write_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away mid-stream (e.g. the backend cancelled it)
+            print("stream cancelled by client")
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    ap = argparse.ArgumentParser(description="OpenAI-compatible stand-in server.")
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--ttft", type=float, default=0.3, help="Seconds before the first token")
+    ap.add_argument("--token-delay", type=float, default=0.02, help="Seconds between tokens")
+    ap.add_argument("--tokens", type=int, default=60, help="Tokens per reply")
+    a = ap.parse_args()
+
+    FakeOpenAIHandler.ttft = a.ttft
+    FakeOpenAIHandler.token_delay = a.token_delay
+    FakeOpenAIHandler.tokens = a.tokens
+
+    server = ThreadingHTTPServer(("127.0.0.1", a.port), FakeOpenAIHandler)
+    print(f"Fake OpenAI server on http://127.0.0.1:{a.port}/v1 (ttft={a.ttft}s, {a.tokens} tokens)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
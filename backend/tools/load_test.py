@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Compare gunicorn worker profiles on the I/O-bound routes using local stub upstreams.
+
+Starts tools/fake_fmp_server.py and tools/fake_openai_server.py, then for each
+profile boots gunicorn with gunicorn.conf.py, hammers /api/dividend-yield
+(a fresh symbol per request, so every call reaches the stub FMP) and /api/chat
+from concurrent clients, and prints throughput and latency per route.
+
+Usage (from backend/):
+    python3 tools/load_test.py [--profiles sync,gthread] [--duration 10] [--concurrency 32]
+"""
+import argparse
+import itertools
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(BACKEND_DIR, "tools")
+
+
+def start(cmd, env=None):
+    return subprocess.Popen(
+        cmd, cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def stop(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=10)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        proc.kill()
+
+
+def wait_until_up(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code < 500:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_load(base_url, route, concurrency, duration, tag):
+    """Hit one route from `concurrency` clients for `duration` seconds"""
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies, statuses = [], {}
+    deadline = time.monotonic() + duration
+
+    def client(index):
+        session = requests.Session()
+        # Stands in for the platform proxy (TRUSTED_PROXY_HOPS=1) so each client gets its own fair share
+        headers = {"X-Forwarded-For": f"10.0.{index // 250}.{index % 250}"}
+        while time.monotonic() < deadline:
+            n = next(counter)
+            started = time.monotonic()
+            try:
+                if route == "dividend":
+                    response = session.get(
+                        f"{base_url}/api/dividend-yield",
+                        params={"symbol": f"LT{tag}{n}"}, timeout=60,
+                    )
+                else:
+                    response = session.post(
+                        f"{base_url}/api/chat",
+                        json={"message": f"Load test question {n}"}, headers=headers, timeout=60,
+                    )
+                status = response.status_code
+                if status == 503:
+                    # Back off like a well-behaved client instead of spinning on rejections
+                    time.sleep(min(float(response.headers.get("Retry-After", 1)), max(0.0, deadline - time.monotonic())))
+            except requests.RequestException:
+                status = "error"
+            elapsed = time.monotonic() - started
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.monotonic() - started
+
+    ok = statuses.get(200, 0)
+    return {
+        "ok": ok,
+        "rejected": statuses.get(503, 0),
+        "failed": sum(count for status, count in statuses.items() if status not in (200, 503)),
+        "rps": ok / wall,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Load-test gunicorn worker profiles against stub upstreams.")
+    ap.add_argument("--profiles", default="sync,gthread", help="Comma-separated worker classes")
+    ap.add_argument("--routes", default="dividend,chat", help="Comma-separated: dividend, chat")
+    ap.add_argument("--duration", type=float, default=10, help="Seconds per route and profile")
+    ap.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    ap.add_argument("--workers", type=int, default=2, help="Gunicorn workers")
+    ap.add_argument("--threads", type=int, default=8, help="Threads per worker (gthread)")
+    ap.add_argument("--fmp-latency", type=float, default=0.2, help="Stub FMP latency (seconds)")
+    ap.add_argument("--openai-ttft", type=float, default=0.5, help="Stub OpenAI latency (seconds)")
+    ap.add_argument("--port", type=int, default=5101, help="Port for the backend under test")
+    a = ap.parse_args()
+
+    fmp_port, openai_port = a.port + 1, a.port + 2
+    stubs = [
+        start([sys.executable, os.path.join(TOOLS_DIR, "fake_fmp_server.py"),
+               "--port", str(fmp_port), "--latency", str(a.fmp_latency)]),
+        start([sys.executable, os.path.join(TOOLS_DIR, "fake_openai_server.py"),
+               "--port", str(openai_port), "--ttft", str(a.openai_ttft),
+               "--token-delay", "0", "--tokens", "40"]),
+    ]
+    data_dir = tempfile.mkdtemp(prefix="loadtest-")
+    results = []
+    try:
+        for profile in [p.strip() for p in a.profiles.split(",") if p.strip()]:
+            env = {
+                **os.environ,
+                "PORT": str(a.port),
+                "WEB_CONCURRENCY": str(a.workers),
+                "GUNICORN_WORKER_CLASS": profile,
+                "GUNICORN_THREADS": str(a.threads),
+                "GUNICORN_ACCESS_LOG": "",
+                "FMP_API_KEY": "stub",
+                "FMP_BASE_URL": f"http://127.0.0.1:{fmp_port}/stable",
+                "FMP_CALLS_PER_MINUTE": "1000000",
+                "OPENAI_API_KEY": "",
+                "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+                "MARKET_CACHE_BACKEND": "memory",
+                "DIVIDEND_STORE_PATH": os.path.join(data_dir, f"{profile}.sqlite3"),
+                "PREWARM_ENABLED": "0",
+                "CHAT_CACHE_MODES": "",
+                "TRUSTED_PROXY_HOPS": "1",
+            }
+            server = start([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"], env=env)
+            try:
+                base_url = f"http://127.0.0.1:{a.port}"
+                wait_until_up(f"{base_url}/api/health")
+                for route in [r.strip() for r in a.routes.split(",") if r.strip()]:
+                    print(f"{profile}: {route} x{a.concurrency} for {a.duration:.0f}s ...", flush=True)
+                    stats = run_load(base_url, route, a.concurrency, a.duration, profile.upper())
+                    results.append((profile, route, stats))
+            finally:
+                stop(server)
+    finally:
+        for stub in stubs:
+            stop(stub)
+
+    print()
+    print(f"{'profile':<10}{'route':<10}{'ok':>7}{'503':>7}{'failed':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for profile, route, s in results:
+        print(f"{profile:<10}{route:<10}{s['ok']:>7}{s['rejected']:>7}{s['failed']:>8}"
+              f"{s['rps']:>9.1f}{s['p50']:>9.0f}{s['p95']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -612,6 +612,56 @@ async function fetchDividendYield(symbol) {
     }
 }
 
+// Stream dividend yields for several symbols; onResult(symbol, yield) fires as each resolves.
+// Falls back to one request per symbol if streaming isn't available.
+async function streamDividendYields(symbols, onResult) {
+    const delivered = new Set();
+    const deliver = (symbol, yieldData) => {
+        if (delivered.has(symbol)) return;
+        delivered.add(symbol);
+        onResult(symbol, yieldData);
+    };
+
+    try {
+        const response = await fetch(`${API_BASE_URL}/batch-dividend-yields/stream`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ symbols })
+        });
+        if (!response.ok || !response.body) throw new Error(`Stream unavailable (${response.status})`);
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                const item = JSON.parse(line);
+                if (!item.symbol) continue;
+                const result = item.result || {};
+                if (result.error) {
+                    console.warn(`API error for ${item.symbol}:`, result.message || 'Unknown error');
+                    deliver(item.symbol, getMockDividendYield(item.symbol));
+                } else {
+                    deliver(item.symbol, result.dividendYield);
+                }
+            }
+        }
+    } catch (error) {
+        console.error('Failed to stream dividend yields:', error);
+    }
+
+    // Anything the stream didn't cover goes through the single-symbol endpoint
+    await Promise.all(symbols
+        .filter(symbol => !delivered.has(symbol.toUpperCase()))
+        .map(symbol => fetchDividendYield(symbol).then(yieldData => deliver(symbol.toUpperCase(), yieldData))));
+}
+
 // Get mock dividend yield (fallback)
 function getMockDividendYield(symbol) {
     if (mockDividendYields[symbol]) {
@@ -2503,11 +2553,15 @@ function refreshStockModalDisplay() {
     refreshStockList();
 }
 
+// Symbols whose yields are currently being streamed, so re-renders don't refetch them
+const pendingYieldSymbols = new Set();
+
 // Separate function to refresh just the stock list (called by async yield fetches)
 function refreshStockList() {
     const stockEditList = document.getElementById('stockEditList');
     if (!stockEditList) return;
     stockEditList.innerHTML = '';
+    const missingYields = [];
 
     appState.portfolio.forEach((stock, index) => {
         const stockItem = document.createElement('div');
@@ -2524,16 +2578,9 @@ function refreshStockList() {
             `;
             stockEditList.appendChild(stockItem);
 
-            // Fetch yield asynchronously - only refresh stock list, NOT the whole display
-            fetchDividendYield(stock.symbol).then(yieldData => {
-                if (yieldData) {
-                    stock.yield = yieldData;
-                    // Calculate monthly income for this stock
-                    const annualDividend = (appState.portfolioValue * (stock.percent / 100)) * (yieldData / 100);
-                    stock.monthlyIncome = annualDividend / 12;
-                    refreshStockList(); // Only refresh stock list, preserves portfolio value input
-                }
-            });
+            if (!pendingYieldSymbols.has(stock.symbol.toUpperCase())) {
+                missingYields.push(stock.symbol.toUpperCase());
+            }
         } else {
             // Calculate monthly income if not already set
             if (!stock.monthlyIncome || stock.monthlyIncome === 0) {
@@ -2552,6 +2599,24 @@ function refreshStockList() {
         }
     });
 
+    // Stream all missing yields in one request - only refresh stock list, NOT the whole display
+    if (missingYields.length > 0) {
+        missingYields.forEach(symbol => pendingYieldSymbols.add(symbol));
+        streamDividendYields(missingYields, (symbol, yieldData) => {
+            pendingYieldSymbols.delete(symbol);
+            if (!yieldData) return;
+            appState.portfolio
+                .filter(stock => stock.symbol.toUpperCase() === symbol && !stock.yield)
+                .forEach(stock => {
+                    stock.yield = yieldData;
+                    // Calculate monthly income for this stock
+                    const annualDividend = (appState.portfolioValue * (stock.percent / 100)) * (yieldData / 100);
+                    stock.monthlyIncome = annualDividend / 12;
+                });
+            refreshStockList(); // Only refresh stock list, preserves portfolio value input
+        });
+    }
+
     // Validate total percentage
     validatePortfolioPercentage();
 }
@@ -3084,7 +3149,20 @@ function validatePortfolioPercentage() {
 }
 
 // --- MCP Context Pusher ---
+// After the first full snapshot only changes are sent: a JSON Patch for appState
+// and one splice for the DOM, against the version the server last acknowledged.
+// Nothing is sent when nothing changed; large bodies are gzipped when supported.
+const contextSync = {
+    version: null, // server version of the last acknowledged snapshot
+    dom: null,
+    state: null,   // JSON string of the acknowledged appState
+    url: null,
+    inFlight: false
+};
+
 async function pushContextToServer() {
+    if (contextSync.inFlight) return;
+    contextSync.inFlight = true;
     try {
         const dom = document.documentElement ? document.documentElement.outerHTML : '';
 
@@ -3096,19 +3174,119 @@ async function pushContextToServer() {
             totalBuilderSteps: 6,
             screenType: getScreenType(appState.currentStep)
         };
+        const stateJson = JSON.stringify(contextState);
+        const url = window.location.href;
 
-        await fetch(API_BASE_URL + '/mcp/update-context', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                dom,
-                appState: contextState,
-                url: window.location.href
-            })
-        });
+        if (contextSync.version && dom === contextSync.dom && stateJson === contextSync.state && url === contextSync.url) {
+            return;
+        }
+
+        const fullSnapshot = { dom, appState: JSON.parse(stateJson), url };
+        let response;
+        if (contextSync.version) {
+            const delta = {
+                baseVersion: contextSync.version,
+                appStatePatch: diffJson(JSON.parse(contextSync.state), JSON.parse(stateJson)),
+                domDelta: diffText(contextSync.dom, dom)
+            };
+            if (url !== contextSync.url) delta.url = url;
+            response = await postContext(delta);
+            if (response.status === 409) {
+                // The server no longer has our base snapshot (restart, other worker): resend it all
+                response = await postContext(fullSnapshot);
+            }
+        } else {
+            response = await postContext(fullSnapshot);
+        }
+
+        if (!response.ok) {
+            contextSync.version = null;
+            return;
+        }
+        const data = await response.json();
+        contextSync.version = data.version || null;
+        contextSync.dom = dom;
+        contextSync.state = stateJson;
+        contextSync.url = url;
     } catch (e) {
         // Silently fail - don't disrupt user experience
+        contextSync.version = null;
+    } finally {
+        contextSync.inFlight = false;
+    }
+}
+
+// Per-tab id so the server keeps each visitor's screen context separate
+function getContextSessionId() {
+    let id = sessionStorage.getItem('contextSessionId');
+    if (!id) {
+        id = (window.crypto && crypto.randomUUID)
+            ? crypto.randomUUID()
+            : Date.now().toString(36) + Math.random().toString(36).slice(2);
+        sessionStorage.setItem('contextSessionId', id);
+    }
+    return id;
+}
+
+async function postContext(payload) {
+    const json = JSON.stringify(payload);
+    const headers = { 'Content-Type': 'application/json', 'X-Session-Id': getContextSessionId() };
+    let body = json;
+    if (json.length > 2048 && typeof CompressionStream !== 'undefined') {
+        const stream = new Blob([json]).stream().pipeThrough(new CompressionStream('gzip'));
+        body = await new Response(stream).blob();
+        headers['Content-Encoding'] = 'gzip';
     }
+    return fetch(API_BASE_URL + '/mcp/update-context', { method: 'POST', headers, body });
+}
+
+// JSON Patch (add/remove/replace) turning before into after; arrays that change
+// length are replaced whole
+function diffJson(before, after, path = '', ops = []) {
+    const isObject = value => value !== null && typeof value === 'object';
+    const sameShape = isObject(before) && isObject(after) &&
+        Array.isArray(before) === Array.isArray(after) &&
+        (!Array.isArray(before) || before.length === after.length);
+
+    if (!sameShape) {
+        if (JSON.stringify(before) !== JSON.stringify(after)) {
+            ops.push({ op: 'replace', path, value: after });
+        }
+        return ops;
+    }
+    const pointer = key => path + '/' + String(key).replace(/~/g, '~0').replace(/\//g, '~1');
+    for (const key of Object.keys(before)) {
+        if (!(key in after)) ops.push({ op: 'remove', path: pointer(key) });
+        else diffJson(before[key], after[key], pointer(key), ops);
+    }
+    for (const key of Object.keys(after)) {
+        if (!(key in before)) ops.push({ op: 'add', path: pointer(key), value: after[key] });
+    }
+    return ops;
+}
+
+// Single splice turning before into after (offsets in UTF-16 code units), or null
+function diffText(before, after) {
+    const max = Math.min(before.length, after.length);
+    let start = 0;
+    while (start < max && before.charCodeAt(start) === after.charCodeAt(start)) start++;
+    let end = 0;
+    while (end < max - start &&
+        before.charCodeAt(before.length - 1 - end) === after.charCodeAt(after.length - 1 - end)) end++;
+
+    // Never split a surrogate pair (emoji) across the splice boundary
+    const isHigh = code => code >= 0xD800 && code <= 0xDBFF;
+    const isLow = code => code >= 0xDC00 && code <= 0xDFFF;
+    if (start > 0 && isHigh(before.charCodeAt(start - 1))) start--;
+    if (end > 0 && isLow(after.charCodeAt(after.length - end))) end--;
+
+    if (start === before.length && start === after.length) return null;
+    return {
+        start,
+        deleteCount: before.length - start - end,
+        text: after.slice(start, after.length - end),
+        length: after.length
+    };
 }
 
 // Helper function to categorize screen types
@@ -3381,50 +3559,6 @@ document.addEventListener('click', (e) => {
 });
 
 
-
-// --- MCP Context Pusher ---
-async function pushContextToServer() {
-    try {
-        const dom = document.documentElement ? document.documentElement.outerHTML : '';
-
-        // Normalize step information for chatbot context
-        const contextState = {
-            ...appState,
-            // Add normalized step info for chatbot
-            builderStep: appState.currentStep >= 1 && appState.currentStep <= 6 ? appState.currentStep : null,
-            totalBuilderSteps: 6,
-            screenType: getScreenType(appState.currentStep)
-        };
-
-        await fetch(API_BASE_URL + '/mcp/update-context', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                dom,
-                appState: contextState,
-                url: window.location.href
-            })
-        });
-    } catch (e) {
-        // Silently fail - don't disrupt user experience
-    }
-}
-
-// Helper function to categorize screen types
-function getScreenType(currentStep) {
-    if (currentStep === 0) return 'landing';
-    if (currentStep >= 1 && currentStep <= 6) return 'builder';
-    if (currentStep === 7) return 'calculating';
-    if (currentStep === 8) return 'congratulations';
-    if (currentStep === 9) return 'dashboard';
-    return 'unknown';
-}
-
-// Push context immediately and then every 10 seconds
-pushContextToServer();
-setInterval(pushContextToServer, 10000);
-
-
 // Helper function to escape HTML
 function escapeHtml(text) {
     const div = document.createElement('div');
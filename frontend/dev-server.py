@@ -2,12 +2,18 @@
 """
 Local development server with SPA routing support.
 Mimics Vercel's rewrite rules for local development.
+
+Live reload: HTML pages get a small script that listens on /__livereload (SSE).
+`python3 tools/build_blog.py --watch` POSTs to /__livereload/notify after each
+rebuild, and open blog pages showing a rebuilt post (or the listing) reload.
 """
 
 import http.server
+import json
 import socketserver
 import os
 import sys
+import threading
 
 PORT = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
 DIRECTORY = os.path.dirname(os.path.abspath(__file__))
@@ -27,11 +33,51 @@ REWRITES = {
     '/tools/sequence-risk/': '/tools/sequence-risk/index.html',
 }
 
+LIVERELOAD_PATH = '/__livereload'
+LIVERELOAD_SCRIPT = b"""<script>
+(() => {
+  const source = new EventSource('/__livereload');
+  source.addEventListener('reload', (event) => {
+    const change = JSON.parse(event.data);
+    const path = location.pathname.replace(/\\/$/, '');
+    const post = path.match(/^\\/blog\\/(?:posts\\/)?([^/.]+)/);
+    if (change.all || path === '/blog' || path === '/blog.html' || (post && change.slugs.includes(post[1]))) {
+      location.reload();
+    }
+  });
+})();
+</script>
+"""
+
+class LiveReload:
+    """Latest rebuild notice; SSE handlers wait for the generation to move"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.generation = 0
+        self.payload = '{}'
+
+    def publish(self, payload: str) -> None:
+        with self._cond:
+            self.generation += 1
+            self.payload = payload
+            self._cond.notify_all()
+
+    def wait(self, seen: int, timeout: float):
+        with self._cond:
+            self._cond.wait_for(lambda: self.generation != seen, timeout)
+            return self.generation, self.payload
+
+livereload = LiveReload()
+
 class SPAHandler(http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=DIRECTORY, **kwargs)
     
     def do_GET(self):
+        if self.path == LIVERELOAD_PATH:
+            return self.serve_livereload()
+
         # We want to redirect the absolute root exactly
         if self.path == '/' or self.path == '/?':
             self.send_response(302)
@@ -54,8 +100,58 @@ class SPAHandler(http.server.SimpleHTTPRequestHandler):
             self.send_response(204)
             self.end_headers()
             return
-        
+
+        file_path = self.translate_path(self.path)
+        if file_path.endswith('.html') and os.path.isfile(file_path):
+            return self.serve_html(file_path)
         return super().do_GET()
+
+    def do_POST(self):
+        # Only build_blog.py on this machine may trigger reloads
+        if self.path != LIVERELOAD_PATH + '/notify' or self.client_address[0] not in ('127.0.0.1', '::1'):
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        try:
+            change = json.loads(body or b'{}')
+        except ValueError:
+            self.send_error(400, 'Invalid JSON')
+            return
+        livereload.publish(json.dumps({'all': bool(change.get('all')), 'slugs': change.get('slugs') or []}))
+        self.send_response(204)
+        self.end_headers()
+
+    def serve_html(self, file_path):
+        with open(file_path, 'rb') as f:
+            html = f.read()
+        index = html.lower().rfind(b'</body>')
+        html = html[:index] + LIVERELOAD_SCRIPT + html[index:] if index != -1 else html + LIVERELOAD_SCRIPT
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(html)))
+        # Always refetch so a reload shows the fresh build
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(html)
+
+    def serve_livereload(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        seen = livereload.generation
+        try:
+            while True:
+                generation, payload = livereload.wait(seen, timeout=15)
+                if generation == seen:
+                    # Comment line keeps the connection from idling out
+                    self.wfile.write(b': ping\n\n')
+                else:
+                    seen = generation
+                    self.wfile.write(f'event: reload\ndata: {payload}\n\n'.encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
     
     def log_message(self, format, *args):
         status = args[1] if len(args) > 1 else ''
@@ -68,12 +164,18 @@ class SPAHandler(http.server.SimpleHTTPRequestHandler):
         reset = '\033[0m'
         print(f"{color}[{args[1]}]{reset} {args[0]}")
 
+class DevServer(socketserver.ThreadingTCPServer):
+    # One thread per connection: each open tab holds a live-reload stream
+    daemon_threads = True
+    allow_reuse_address = True
+
 def run():
-    with socketserver.TCPServer(("", PORT), SPAHandler) as httpd:
+    with DevServer(("", PORT), SPAHandler) as httpd:
         print(f"\n🔥 But First Fire - Local Dev Server")
         print(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
         print(f"  Frontend: http://localhost:{PORT}")
         print(f"  Backend:  http://localhost:5001 (start separately)")
+        print(f"  Blog:     python3 tools/build_blog.py --watch (live reload)")
         print(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
         print(f"\nPress Ctrl+C to stop\n")
         
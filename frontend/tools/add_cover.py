@@ -16,7 +16,7 @@ Options:
                          Use `top` for portraits so heads/faces aren't cut off.
     --width N        Output width in px (default: 1200; height is 9/16 of it).
     --quality N      WEBP quality 0-100 (default: 82).
-    --build          Run build_blog.py afterwards.
+    --build          Rebuild this post (plus posts.json/sitemap.xml) afterwards.
     --dry-run        Convert to /tmp and report, without touching the post.
 
 Examples:
@@ -118,10 +118,10 @@ def main() -> None:
     print(f"meta   -> cover={dest.name!r}" + (f", cover_alt set" if a.alt else " (no --alt given)"))
 
     if a.build:
-        subprocess.run(["python3", str(FRONTEND / "tools" / "build_blog.py")], check=True)
+        subprocess.run([sys.executable, str(FRONTEND / "tools" / "build_blog.py"), "--only", a.slug], check=True)
         print("build  -> done")
     else:
-        print("next   -> run: python3 tools/build_blog.py")
+        print(f"next   -> run: python3 tools/build_blog.py --only {a.slug}  (or keep --watch running)")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,33 @@
 #!/usr/bin/env python3
+"""
+Build blog posts (blog/posts/<slug>/index.html), posts.json and the sitemap blog block.
+
+Incremental: tools/.build_manifest.json records content hashes of each post's
+meta.json and post.md and of post_template.html. Only posts whose inputs changed
+(or whose index.html is missing) are rebuilt; a template change, a change to
+this script or a different BASE_URL rebuilds everything.
+
+With --jobs N, stale posts are rendered across N processes; records are merged
+back in slug order, so posts.json and the sitemap don't depend on scheduling.
+
+--watch keeps running and rebuilds as files change: edits to a post's meta.json or
+post.md rebuild that post plus posts.json/sitemap.xml, an edit to post_template.html
+rebuilds all posts. Bursts of changes (editor save + rename) are debounced into one
+build, and dev-server.py is told to reload the browser. Uses watchdog
+(pip install watchdog) when installed, otherwise polls.
+
+Usage (from frontend/):
+    python3 tools/build_blog.py [--force] [--jobs N] [--only SLUG ...]
+    python3 tools/build_blog.py --watch [--notify-url URL]
+"""
+import argparse
+import hashlib
 import json
 import os
+import threading
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -9,6 +36,14 @@ try:
 except ImportError:
     raise SystemExit("Missing dependency: pip install markdown")
 
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+
 # Paths
 THIS = Path(__file__).resolve()
 FRONTEND = THIS.parents[1]
@@ -30,6 +65,18 @@ SITE_URL = BASE_URL or "https://butfirstfire.com"
 SITEMAP_BLOG_START = "<!-- BLOG:START (auto-generated by build_blog.py — do not edit by hand) -->"
 SITEMAP_BLOG_END = "<!-- BLOG:END -->"
 
+MARKDOWN_EXTENSIONS = ["extra", "fenced_code", "tables", "toc"]
+
+# Build manifest (local state, not committed)
+MANIFEST_PATH = THIS.parent / ".build_manifest.json"
+MANIFEST_VERSION = 1
+
+# Watch mode
+LIVERELOAD_URL = os.environ.get("LIVERELOAD_URL", "http://127.0.0.1:3000/__livereload/notify")
+WATCH_DEBOUNCE = 0.15   # seconds of quiet before a burst of changes is built
+WATCH_POLL_INTERVAL = 0.5
+ALL_POSTS = "*"
+
 def iso_date(s: str) -> str:
     # Validates and normalizes ISO date
     try:
@@ -187,6 +234,17 @@ def render_html(template: str, *, slug: str, meta: dict, html_content: str) -> s
 
     return page
 
+# One Markdown instance per process; building it (loading the extensions) costs more
+# than converting a typical post
+_markdown = None
+
+def markdown_to_html(text: str) -> str:
+    global _markdown
+    if _markdown is None:
+        _markdown = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    # reset() clears per-document state (toc ids, footnotes, abbreviations)
+    return _markdown.reset().convert(text)
+
 def build_one_post(slug: str, template: str) -> dict:
     folder = POSTS_DIR / slug
     meta_path = folder / "meta.json"
@@ -203,10 +261,7 @@ def build_one_post(slug: str, template: str) -> dict:
     # Pre-process interactions
     md_text = process_live_tags(md_text)
 
-    html_content = markdown.markdown(
-        md_text,
-        extensions=["extra", "fenced_code", "tables", "toc"]
-    )
+    html_content = markdown_to_html(md_text)
 
     # Render final HTML
     html = render_html(template, slug=slug, meta=meta, html_content=html_content)
@@ -310,24 +365,273 @@ def update_sitemap(records: list[dict]) -> None:
         )
     new_block = SITEMAP_BLOG_START + "\n" + "\n\n".join(blocks) + "\n  " + SITEMAP_BLOG_END
     pattern = re.compile(re.escape(SITEMAP_BLOG_START) + r".*?" + re.escape(SITEMAP_BLOG_END), re.DOTALL)
-    xml = pattern.sub(lambda _m: new_block, xml)
-    SITEMAP_PATH.write_text(xml, encoding="utf-8")
+    new_xml = pattern.sub(lambda _m: new_block, xml)
+    if new_xml == xml:
+        print("  sitemap: no change — skipped")
+        return
+    SITEMAP_PATH.write_text(new_xml, encoding="utf-8")
     print(f"  sitemap: wrote {len(recs)} blog URLs")
 
 
-def main():
-    template = load_template()
-    posts = []
+def fingerprint(path: Path, previous: dict | None = None) -> dict:
+    """sha256 of a build input. The hash is reused while mtime and size are unchanged,
+    so an unchanged tree costs one stat() per file instead of a full read."""
+    st = path.stat()
+    if previous and previous.get("mtime_ns") == st.st_mtime_ns and previous.get("size") == st.st_size:
+        return previous
+    return {
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "sha256": hashlib.sha256(path.read_bytes()).hexdigest(),
+    }
+
+def same_content(a: dict | None, b: dict | None) -> bool:
+    return bool(a and b and a.get("sha256") == b.get("sha256"))
+
+def build_signature() -> str:
+    # Anything besides the post files that changes the output: this script, BASE_URL, Markdown
+    h = hashlib.sha256(THIS.read_bytes())
+    h.update(BASE_URL.encode("utf-8"))
+    h.update(getattr(markdown, "__version__", "").encode("utf-8"))
+    return h.hexdigest()
+
+def load_manifest() -> dict:
+    try:
+        manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get("version") == MANIFEST_VERSION else {}
+
+def save_manifest(manifest: dict) -> None:
+    # Write then rename, so an interrupted build never leaves a truncated manifest
+    tmp = MANIFEST_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, MANIFEST_PATH)
+
+# Process pool workers get the template once, not with every task
+_worker_template = None
+
+def _init_worker(template: str) -> None:
+    global _worker_template
+    _worker_template = template
+
+def _build_in_worker(slug: str) -> dict:
+    return build_one_post(slug, _worker_template)
+
+def render_posts(slugs: list[str], template: str, jobs: int = 1) -> list[dict]:
+    """Build each slug's index.html; records come back in the order of slugs"""
+    for slug in slugs:
+        print(f"Building: {slug}")
+    jobs = min(jobs, len(slugs))
+    if jobs <= 1:
+        return [build_one_post(slug, template) for slug in slugs]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(template,)) as pool:
+        # Several posts per task keeps the per-task pickling overhead small
+        return list(pool.map(_build_in_worker, slugs, chunksize=max(1, len(slugs) // (jobs * 4))))
+
+def build(force: bool = False, jobs: int = 1, only: set[str] | None = None) -> dict:
+    """Rebuild the posts whose inputs changed, then posts.json and the sitemap.
+    With `only`, posts outside that set are taken from the manifest without being
+    checked (watch mode knows which posts changed). Returns {"built": [...slugs], "skipped": n}."""
+    previous = {} if force else load_manifest()
+    signature = build_signature()
+    if previous and previous.get("signature") != signature:
+        print("Build script, BASE_URL or Markdown changed — rebuilding all posts")
+        previous = {}
+
+    if not TEMPLATE_PATH.exists():
+        raise FileNotFoundError(f"Template not found: {TEMPLATE_PATH}")
+    template_fp = fingerprint(TEMPLATE_PATH, previous.get("template"))
+    rebuild_all = not same_content(template_fp, previous.get("template"))
+    if previous and rebuild_all:
+        print("post_template.html changed — rebuilding all posts")
+    old_posts = previous.get("posts", {})
+
+    entries, stale = {}, []
     for slug in collect_posts():
         folder = POSTS_DIR / slug
         # Only treat as a post if it has meta.json and post.md
-        if (folder / "meta.json").exists() and (folder / "post.md").exists():
-            print(f"Building: {slug}")
-            record = build_one_post(slug, template)
-            posts.append(record)
+        if not ((folder / "meta.json").exists() and (folder / "post.md").exists()):
+            continue
+        old = old_posts.get(slug, {})
+        if only is not None and slug not in only and not rebuild_all and old.get("record") is not None:
+            entries[slug] = old
+            continue
+        meta_fp = fingerprint(folder / "meta.json", old.get("meta"))
+        post_fp = fingerprint(folder / "post.md", old.get("post"))
+        entries[slug] = {"meta": meta_fp, "post": post_fp, "record": old.get("record")}
+        if (
+            rebuild_all
+            or old.get("record") is None
+            or not same_content(meta_fp, old.get("meta"))
+            or not same_content(post_fp, old.get("post"))
+            or not (folder / OUTPUT_INDEX).exists()
+        ):
+            stale.append(slug)
+
+    if stale:
+        for slug, record in zip(stale, render_posts(stale, load_template(), jobs)):
+            entries[slug]["record"] = record
+    # entries is in slug order whichever posts were rebuilt and however the pool ran them
+    posts = [entry["record"] for entry in entries.values()]
+
     write_posts_index(posts)
     update_sitemap(posts)
-    print(f"Built {len(posts)} post(s). Output: posts.json + sitemap.xml updated.")
+    save_manifest({
+        "version": MANIFEST_VERSION,
+        "signature": signature,
+        "template": template_fp,
+        "posts": entries,
+    })
+    return {"built": stale, "skipped": len(posts) - len(stale)}
+
+def affected_post(path: str) -> str | None:
+    """Which post a changed path belongs to: a slug, ALL_POSTS for the template,
+    or None for files the build doesn't read (including its own output)."""
+    p = Path(path).absolute()
+    if p == TEMPLATE_PATH:
+        return ALL_POSTS
+    try:
+        parts = p.relative_to(POSTS_DIR).parts
+    except ValueError:
+        return None
+    if not parts or parts[0].startswith(".") or parts[0] == "posts.json":
+        return None
+    # A post folder appearing/disappearing, or one of its two inputs changing
+    if len(parts) == 1 or (len(parts) == 2 and parts[1] in ("meta.json", "post.md")):
+        return parts[0]
+    return None
+
+class PendingChanges:
+    """Changed slugs collected from the watcher, handed out once things go quiet"""
+
+    def __init__(self, debounce: float = WATCH_DEBOUNCE):
+        self.debounce = debounce
+        self._cond = threading.Condition()
+        self._slugs: set[str] = set()
+        self._last = 0.0
+
+    def add(self, slug: str) -> None:
+        with self._cond:
+            self._slugs.add(slug)
+            self._last = time.monotonic()
+            self._cond.notify()
+
+    def wait(self) -> set[str]:
+        with self._cond:
+            while not self._slugs:
+                self._cond.wait()
+            # Editors often write a temp file, rename it and touch metadata; build once
+            while (remaining := self._last + self.debounce - time.monotonic()) > 0:
+                self._cond.wait(remaining)
+            slugs, self._slugs = self._slugs, set()
+            return slugs
+
+class _WatchdogHandler(FileSystemEventHandler):
+    # Newer watchdog also reports opened/closed; the build reading its own inputs must not count
+    CONTENT_EVENTS = {"created", "deleted", "modified", "moved"}
+
+    def __init__(self, pending: PendingChanges):
+        self.pending = pending
+
+    def on_any_event(self, event):
+        if event.event_type not in self.CONTENT_EVENTS:
+            return
+        # A folder's mtime changes whenever the build writes index.html into it
+        if event.is_directory and event.event_type == "modified":
+            return
+        for path in (event.src_path, getattr(event, "dest_path", None)):
+            slug = affected_post(os.fsdecode(path)) if path else None
+            if slug:
+                self.pending.add(slug)
+
+def _snapshot() -> dict[str, tuple]:
+    files = {}
+    paths = [TEMPLATE_PATH]
+    for slug in collect_posts():
+        paths += [POSTS_DIR / slug, POSTS_DIR / slug / "meta.json", POSTS_DIR / slug / "post.md"]
+    for path in paths:
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        # Folders only matter for appearing/disappearing, not for their mtime
+        files[str(path)] = None if path.is_dir() else (st.st_mtime_ns, st.st_size)
+    return files
+
+def _poll(pending: PendingChanges, interval: float) -> None:
+    before = _snapshot()
+    while True:
+        time.sleep(interval)
+        after = _snapshot()
+        for path in before.keys() | after.keys():
+            if before.get(path, False) != after.get(path, False):
+                slug = affected_post(path)
+                if slug:
+                    pending.add(slug)
+        before = after
+
+def notify_dev_server(url: str, change: dict) -> None:
+    # dev-server.py may not be running; the build itself already succeeded
+    if not url:
+        return
+    req = urllib.request.Request(url, data=json.dumps(change).encode("utf-8"),
+                                 headers={"Content-Type": "application/json"}, method="POST")
+    try:
+        urllib.request.urlopen(req, timeout=1).close()
+    except OSError:
+        pass
+
+def watch(jobs: int = 1, notify_url: str = LIVERELOAD_URL, poll_interval: float = WATCH_POLL_INTERVAL) -> None:
+    build(jobs=jobs)
+    pending = PendingChanges()
+    if WATCHDOG_AVAILABLE:
+        observer = Observer()
+        handler = _WatchdogHandler(pending)
+        observer.schedule(handler, str(POSTS_DIR), recursive=True)
+        observer.schedule(handler, str(BLOG_DIR), recursive=False)
+        observer.daemon = True
+        observer.start()
+        print(f"Watching {BLOG_DIR.relative_to(FRONTEND)} (watchdog). Ctrl+C to stop.")
+    else:
+        threading.Thread(target=_poll, args=(pending, poll_interval), daemon=True).start()
+        print(f"Watching {BLOG_DIR.relative_to(FRONTEND)} (polling every {poll_interval}s; "
+              "pip install watchdog for instant rebuilds). Ctrl+C to stop.")
+
+    while True:
+        slugs = pending.wait()
+        started = time.perf_counter()
+        rebuild_all = ALL_POSTS in slugs
+        try:
+            result = build(jobs=jobs, only=None if rebuild_all else slugs)
+        except Exception as e:
+            # Keep watching: a half-typed meta.json shouldn't end the session
+            print(f"Build failed: {e}")
+            continue
+        print(f"Rebuilt {len(result['built'])} post(s) in {(time.perf_counter() - started) * 1000:.0f} ms")
+        notify_dev_server(notify_url, {"all": rebuild_all, "slugs": sorted(slugs - {ALL_POSTS})})
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Build blog posts, posts.json and the sitemap blog block.")
+    ap.add_argument("--force", action="store_true", help="Ignore the build manifest and rebuild every post")
+    ap.add_argument("--jobs", "-j", type=int, default=1,
+                    help="Processes for rendering posts (0 = one per CPU core)")
+    ap.add_argument("--only", action="append", metavar="SLUG",
+                    help="Only check these posts for changes (repeatable); others keep their last build")
+    ap.add_argument("--watch", action="store_true", help="Rebuild whenever posts or the template change")
+    ap.add_argument("--notify-url", default=LIVERELOAD_URL,
+                    help="dev-server.py endpoint told to reload the browser in --watch mode ('' to disable)")
+    a = ap.parse_args(argv)
+    jobs = a.jobs if a.jobs > 0 else (os.cpu_count() or 1)
+    if a.watch:
+        try:
+            watch(jobs=jobs, notify_url=a.notify_url)
+        except KeyboardInterrupt:
+            print("\nStopped watching")
+        return
+    result = build(force=a.force, jobs=jobs, only=set(a.only) if a.only else None)
+    print(f"Built {len(result['built'])} post(s), {result['skipped']} unchanged. "
+          "Output: posts.json + sitemap.xml updated.")
 
 if __name__ == "__main__":
     main()